@@ -1,26 +1,171 @@
 import csv
+import os
 import requests
 import json
 import time
-from typing import Dict, List, Set
-from collections import defaultdict
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Set
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
+from urllib.parse import quote
+from socket_cache import SocketPayloadCache, cache_key
+from result_store import ResultStore
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 초로 변환"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _npm_purl(package_name: str) -> str:
+    """npm 패키지명 → package URL (scope의 '@'는 %40으로 인코딩, 버전 생략 = latest)"""
+    if package_name.startswith('@') and '/' in package_name:
+        scope, name = package_name[1:].split('/', 1)
+        return f"pkg:npm/%40{quote(scope, safe='')}/{quote(name, safe='')}"
+    return f"pkg:npm/{quote(package_name, safe='')}"
+
+
+def _artifact_package_name(artifact: Dict) -> str:
+    """PURL 응답 아티팩트의 namespace/name → npm 패키지명"""
+    name = artifact.get('name', '')
+    namespace = artifact.get('namespace')
+    if namespace:
+        return f"{namespace if namespace.startswith('@') else '@' + namespace}/{name}"
+    return name
+
+
+def _parse_artifacts(text: str) -> List[Dict]:
+    """PURL 응답 본문(NDJSON, 또는 JSON 배열)을 아티팩트 목록으로"""
+    text = text.strip()
+    if text.startswith('['):
+        return [a for a in json.loads(text) if isinstance(a, dict)]
+    artifacts = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            obj = json.loads(line)
+            if isinstance(obj, dict):
+                artifacts.append(obj)
+    return artifacts
+
+
+class TokenBucket:
+    """
+    스레드 간 공유 토큰 버킷 (요청 1건 = 토큰 1개)
+    
+    rate(초당 토큰)로 채워지고 capacity개까지 모아 둘 수 있다. rate <= 0 이면 제한 없음.
+    서버 응답의 Retry-After / RateLimit-* 헤더를 보고 전체 일시 정지 또는 속도 하향을 한다.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 1개를 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self._tokens = min(self.capacity, self._tokens + max(0.0, now - self._stamp) * self.rate)
+                    self._stamp = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> bool:
+        """모든 요청을 seconds초 멈춤 (이미 더 길게 멈춰 있으면 그대로, 연장했으면 True)"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until <= self._paused_until:
+                return False
+            self._paused_until = until
+            self._tokens = 0.0
+            self._stamp = until
+            return True
+
+    def observe(self, headers) -> None:
+        """
+        RateLimit-Remaining / RateLimit-Reset (X-RateLimit-* 포함) 헤더로 속도 조정
+        
+        남은 요청 수를 리셋까지 남은 시간에 고르게 나누고(설정값보다 빠르게는 올리지 않음),
+        남은 요청이 0이면 리셋 시각까지 멈춘다.
+        """
+        remaining = headers.get('RateLimit-Remaining', headers.get('X-RateLimit-Remaining'))
+        reset = headers.get('RateLimit-Reset', headers.get('X-RateLimit-Reset'))
+        try:
+            remaining, reset = int(remaining), float(reset)
+        except (TypeError, ValueError):
+            return
+        if reset > 1e9:  # epoch 초로 주는 서버
+            reset = reset - time.time()
+        if reset <= 0:
+            return
+        if remaining <= 0:
+            self.pause(reset)
+            return
+        fair = remaining / reset
+        with self._lock:
+            self.rate = min(self.base_rate, fair) if self.base_rate > 0 else fair
+
 
 class NPMSecurityChecker:
-    def __init__(self, socket_api_token: str):
+    def __init__(self, socket_api_token: str, max_in_flight: int = 1, requests_per_minute: float = 0,
+                 batch_size: int = 0, socket_base_url: str = "https://api.socket.dev/v0",
+                 cache_path: Optional[str] = None, cache_ttl: float = 7 * 24 * 3600,
+                 cache_negative_ttl: float = 24 * 3600, offline: bool = False):
         """
         NPM 패키지 보안 검사기 초기화
         
         Args:
             socket_api_token: Socket.dev API 토큰
+            max_in_flight: 동시에 진행하는 검사 요청 단위 수 (1 = 순차 처리)
+            requests_per_minute: 모든 스레드가 공유하는 분당 요청 수 (Socket.dev 할당량 기준, 0 = 제한 없음)
+            batch_size: 일괄(PURL) 요청 1건에 담을 패키지 수 (0 = 패키지별 score/issues 요청)
+            socket_base_url: API 주소 (같은 응답 형식의 로컬 스텁 서버로 바꿔 테스트 가능)
+            cache_path: score/issues/PURL 원본 응답 캐시(SQLite) 경로 (None = 캐시 미사용)
+            cache_ttl: 200 응답 캐시 유효 시간 (초)
+            cache_negative_ttl: 404 응답 캐시 유효 시간 (초)
+            offline: True면 API를 호출하지 않고 캐시만 사용 (TTL 무시, 캐시에 없으면 not_cached)
         """
         self.socket_api_token = socket_api_token
-        self.socket_base_url = "https://api.socket.dev/v0"
+        self.socket_base_url = socket_base_url.rstrip('/')
         self.headers = {
             "Authorization": f"Bearer {socket_api_token}",
             "Content-Type": "application/json"
         }
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(0, batch_size)
+        self.batch_available = self.batch_size > 1  # 일괄 엔드포인트를 쓸 수 없다고 확인되면 False
+        self.offline = offline
+        self.cache = SocketPayloadCache(cache_path, cache_ttl, cache_negative_ttl) if cache_path else None
+        if offline and self.cache is None:
+            raise ValueError("offline 모드에는 cache_path가 필요합니다")
+        
+        # 요청 속도 제한 (패키지당 요청 2건: score + issues)
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0, capacity=self.max_in_flight)
         
         # 재시도 전략이 포함된 세션 생성
         self.session = self._create_session()
@@ -29,15 +174,16 @@ class NPMSecurityChecker:
         """재시도 로직이 포함된 requests 세션 생성"""
         session = requests.Session()
         
-        # 재시도 전략 설정
+        # 재시도 전략 설정 (429는 TokenBucket이 Retry-After를 보고 모든 스레드를 함께 멈추도록 직접 처리)
         retry_strategy = Retry(
             total=3,  # 최대 3번 재시도
             backoff_factor=2,  # 2초, 4초, 8초로 증가
-            status_forcelist=[429, 500, 502, 503, 504],  # 재시도할 HTTP 상태 코드
+            status_forcelist=[500, 502, 503, 504],  # 재시도할 HTTP 상태 코드
             allowed_methods=["GET", "POST"]
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(max_retries=retry_strategy,
+                              pool_connections=self.max_in_flight, pool_maxsize=self.max_in_flight)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
@@ -72,6 +218,33 @@ class NPMSecurityChecker:
             print(f"✗ CSV 파일 읽기 오류: {e}")
             return []
     
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """토큰 버킷을 거쳐 요청, 응답의 rate-limit 헤더로 속도 조정"""
+        self.rate_limiter.acquire()
+        response = self.session.request(method, url, headers=self.headers, **kwargs)
+        self.rate_limiter.observe(response.headers)
+        return response
+    
+    def _cache_get(self, kind: str, package_name: str, version: str = "latest"):
+        """캐시된 (HTTP 상태, 본문) 또는 None (오프라인 모드는 만료된 항목도 사용)"""
+        if self.cache is None:
+            return None
+        return self.cache.get(cache_key(package_name, version), kind, ignore_ttl=self.offline)
+    
+    def _cache_put(self, kind: str, package_name: str, version: str, http_status: int, payload=None):
+        if self.cache is not None:
+            self.cache.put(cache_key(package_name, version), kind, http_status, payload)
+    
+    def _get(self, url: str) -> requests.Response:
+        return self._request("GET", url, timeout=30)  # 30초로 증가
+    
+    def _wait_rate_limit(self, response: requests.Response):
+        """429 응답: Retry-After(없으면 60초)만큼 모든 요청을 멈춤 (재시도 요청은 버킷에서 재개 시각까지 대기)"""
+        wait_time = _parse_retry_after(response.headers.get('Retry-After'))
+        wait_time = 60 if wait_time is None else wait_time
+        if self.rate_limiter.pause(wait_time):
+            print(f"  ⏳ Rate limit 도달. {wait_time:.0f}초 대기 중...")
+    
     def check_package_security(self, package_name: str, version: str = "latest", retry_count: int = 0) -> Dict:
         """
         Socket.dev API로 패키지 보안 점수 확인 (재시도 로직 포함)
@@ -87,10 +260,26 @@ class NPMSecurityChecker:
         url = f"{self.socket_base_url}/npm/{package_name}/{version}/score"
         max_retries = 3
         
+        cached = self._cache_get('score', package_name, version)
+        if cached is not None:
+            http_status, data = cached
+            return self._score_payload_result(package_name, version, data) if http_status == 200 else {
+                'status': 'not_found',
+                'package_name': package_name,
+                'error': 'Package not found in NPM registry'
+            }
+        if self.offline:
+            return {
+                'status': 'not_cached',
+                'package_name': package_name,
+                'error': 'Not in cache (offline mode)'
+            }
+        
         try:
-            response = self.session.get(url, headers=self.headers, timeout=30)  # 30초로 증가
+            response = self._get(url)
             
             if response.status_code == 404:
+                self._cache_put('score', package_name, version, 404)
                 return {
                     'status': 'not_found',
                     'package_name': package_name,
@@ -100,9 +289,7 @@ class NPMSecurityChecker:
             # Rate limit 처리
             if response.status_code == 429:
                 if retry_count < max_retries:
-                    wait_time = int(response.headers.get('Retry-After', 60))
-                    print(f"  ⏳ Rate limit 도달. {wait_time}초 대기 중...")
-                    time.sleep(wait_time)
+                    self._wait_rate_limit(response)
                     return self.check_package_security(package_name, version, retry_count + 1)
                 else:
                     return {
@@ -113,41 +300,9 @@ class NPMSecurityChecker:
             
             response.raise_for_status()
             data = response.json()
+            self._cache_put('score', package_name, version, 200, data)
             
-            # Supply Chain Risk 분석
-            supply_chain = data.get('supplyChainRisk', {})
-            sc_score = supply_chain.get('score', 1.0)
-            
-            critical_issues = supply_chain.get('supplyChainRiskIssueCritical', 0)
-            high_issues = supply_chain.get('supplyChainRiskIssueHigh', 0)
-            mid_issues = supply_chain.get('supplyChainRiskIssueMid', 0)
-            low_issues = supply_chain.get('supplyChainRiskIssueLow', 0)
-            
-            # 악성코드 판단
-            is_malicious = self._evaluate_malicious(
-                sc_score, critical_issues, high_issues, mid_issues
-            )
-            
-            # 위험도 계산 (0-100%)
-            supply_chain_risk_pct = (1 - sc_score) * 100
-            
-            return {
-                'status': 'success',
-                'package_name': package_name,
-                'version': version,
-                'supply_chain_score': sc_score,
-                'supply_chain_risk_percentage': round(supply_chain_risk_pct, 2),
-                'critical_issues': critical_issues,
-                'high_issues': high_issues,
-                'mid_issues': mid_issues,
-                'low_issues': low_issues,
-                'total_issues': critical_issues + high_issues + mid_issues + low_issues,
-                'is_malicious': is_malicious,
-                'risk_level': self._get_risk_level(sc_score, critical_issues, high_issues),
-                'vulnerability_score': data.get('vulnerability', {}).get('score', 1.0),
-                'quality_score': data.get('quality', {}).get('score', 1.0),
-                'overall_score': data.get('depscore', 1.0)
-            }
+            return self._score_payload_result(package_name, version, data)
             
         except requests.exceptions.Timeout:
             if retry_count < max_retries:
@@ -172,6 +327,53 @@ class NPMSecurityChecker:
                     'error': str(e)
                 }
     
+    def _score_payload_result(self, package_name: str, version: str, data: Dict) -> Dict:
+        """score 엔드포인트 응답 본문 → 보안 점수 결과"""
+        # Supply Chain Risk 분석
+        supply_chain = data.get('supplyChainRisk', {})
+        sc_score = supply_chain.get('score', 1.0)
+        
+        return self._security_result(
+            package_name, version, sc_score,
+            supply_chain.get('supplyChainRiskIssueCritical', 0),
+            supply_chain.get('supplyChainRiskIssueHigh', 0),
+            supply_chain.get('supplyChainRiskIssueMid', 0),
+            supply_chain.get('supplyChainRiskIssueLow', 0),
+            vulnerability_score=data.get('vulnerability', {}).get('score', 1.0),
+            quality_score=data.get('quality', {}).get('score', 1.0),
+            overall_score=data.get('depscore', 1.0)
+        )
+    
+    def _security_result(self, package_name: str, version: str, sc_score: float,
+                         critical_issues: int, high_issues: int, mid_issues: int, low_issues: int,
+                         vulnerability_score: float, quality_score: float, overall_score: float) -> Dict:
+        """보안 점수 결과 구성 (score 엔드포인트와 일괄 PURL 응답 공용)"""
+        # 악성코드 판단
+        is_malicious = self._evaluate_malicious(
+            sc_score, critical_issues, high_issues, mid_issues
+        )
+        
+        # 위험도 계산 (0-100%)
+        supply_chain_risk_pct = (1 - sc_score) * 100
+        
+        return {
+            'status': 'success',
+            'package_name': package_name,
+            'version': version,
+            'supply_chain_score': sc_score,
+            'supply_chain_risk_percentage': round(supply_chain_risk_pct, 2),
+            'critical_issues': critical_issues,
+            'high_issues': high_issues,
+            'mid_issues': mid_issues,
+            'low_issues': low_issues,
+            'total_issues': critical_issues + high_issues + mid_issues + low_issues,
+            'is_malicious': is_malicious,
+            'risk_level': self._get_risk_level(sc_score, critical_issues, high_issues),
+            'vulnerability_score': vulnerability_score,
+            'quality_score': quality_score,
+            'overall_score': overall_score
+        }
+    
     def check_typosquatting(self, package_name: str, retry_count: int = 0) -> Dict:
         """
         Socket.dev API로 typosquatting 확인 (재시도 로직 포함)
@@ -186,10 +388,18 @@ class NPMSecurityChecker:
         url = f"{self.socket_base_url}/npm/{package_name}/latest/issues"
         max_retries = 3
         
+        cached = self._cache_get('issues', package_name)
+        if cached is not None:
+            http_status, data = cached
+            return self._summarize_typo_issues(package_name, data if http_status == 200 else [])
+        if self.offline:
+            return {**self._summarize_typo_issues(package_name, []), 'error': 'Not in cache (offline mode)'}
+        
         try:
-            response = self.session.get(url, headers=self.headers, timeout=30)
+            response = self._get(url)
             
             if response.status_code == 404:
+                self._cache_put('issues', package_name, 'latest', 404)
                 return {
                     'package_name': package_name,
                     'is_typosquatting': False,
@@ -203,57 +413,14 @@ class NPMSecurityChecker:
             # Rate limit 처리
             if response.status_code == 429:
                 if retry_count < max_retries:
-                    wait_time = int(response.headers.get('Retry-After', 60))
-                    print(f"  ⏳ Rate limit 도달. {wait_time}초 대기 중...")
-                    time.sleep(wait_time)
+                    self._wait_rate_limit(response)
                     return self.check_typosquatting(package_name, retry_count + 1)
             
             response.raise_for_status()
             data = response.json()
+            self._cache_put('issues', package_name, 'latest', 200, data)
             
-            # Typosquatting 관련 이슈 찾기
-            typo_issues = []
-            suggested_packages = []
-            max_severity = None
-            
-            for issue in data:
-                issue_type = issue.get('type', '').lower()
-                issue_value = issue.get('value', {})
-                
-                # didYouMean 또는 gptDidYouMean 타입 확인
-                if issue_type in ['didyoumean', 'gptdidyoumean']:
-                    typo_issues.append(issue)
-                    
-                    # alternatePackage 추출
-                    props = issue_value.get('props', {})
-                    alternate_pkg = props.get('alternatePackage')
-                    if alternate_pkg and alternate_pkg not in suggested_packages:
-                        suggested_packages.append(alternate_pkg)
-                    
-                    # 심각도 확인 (가장 높은 심각도 저장)
-                    severity = issue_value.get('severity', '').lower()
-                    if severity == 'critical':
-                        max_severity = 'critical'
-                    elif severity == 'high' and max_severity != 'critical':
-                        max_severity = 'high'
-                    elif severity in ['middle', 'medium'] and max_severity not in ['critical', 'high']:
-                        max_severity = 'medium'
-                    elif severity == 'low' and max_severity is None:
-                        max_severity = 'low'
-            
-            # 결과 반환
-            is_typosquatting = len(typo_issues) > 0
-            primary_suggestion = suggested_packages[0] if suggested_packages else None
-            
-            return {
-                'package_name': package_name,
-                'is_typosquatting': is_typosquatting,
-                'suggested_package': primary_suggestion,
-                'all_suggested_packages': suggested_packages,
-                'typo_details': typo_issues,
-                'typo_severity': max_severity,
-                'typo_count': len(typo_issues)
-            }
+            return self._summarize_typo_issues(package_name, data)
             
         except (requests.exceptions.Timeout, requests.exceptions.RequestException) as e:
             if retry_count < max_retries:
@@ -272,6 +439,61 @@ class NPMSecurityChecker:
                     'error': f'Failed to check typosquatting after retries: {str(e)}'
                 }
     
+    def _summarize_typo_issues(self, package_name: str, issues: List[Dict]) -> Dict:
+        """
+        이슈 목록에서 didYouMean/gptDidYouMean을 골라 typosquatting 결과 구성
+        
+        Args:
+            package_name: 패키지명
+            issues: Socket.dev 이슈 목록 ({'type', 'value': {'severity', 'props'}})
+            
+        Returns:
+            Typosquatting 검사 결과
+        """
+        # Typosquatting 관련 이슈 찾기
+        typo_issues = []
+        suggested_packages = []
+        max_severity = None
+        
+        for issue in issues:
+            issue_type = issue.get('type', '').lower()
+            issue_value = issue.get('value', {})
+            
+            # didYouMean 또는 gptDidYouMean 타입 확인
+            if issue_type in ['didyoumean', 'gptdidyoumean']:
+                typo_issues.append(issue)
+                
+                # alternatePackage 추출
+                props = issue_value.get('props', {})
+                alternate_pkg = props.get('alternatePackage')
+                if alternate_pkg and alternate_pkg not in suggested_packages:
+                    suggested_packages.append(alternate_pkg)
+                
+                # 심각도 확인 (가장 높은 심각도 저장)
+                severity = issue_value.get('severity', '').lower()
+                if severity == 'critical':
+                    max_severity = 'critical'
+                elif severity == 'high' and max_severity != 'critical':
+                    max_severity = 'high'
+                elif severity in ['middle', 'medium'] and max_severity not in ['critical', 'high']:
+                    max_severity = 'medium'
+                elif severity == 'low' and max_severity is None:
+                    max_severity = 'low'
+        
+        # 결과 반환
+        is_typosquatting = len(typo_issues) > 0
+        primary_suggestion = suggested_packages[0] if suggested_packages else None
+        
+        return {
+            'package_name': package_name,
+            'is_typosquatting': is_typosquatting,
+            'suggested_package': primary_suggestion,
+            'all_suggested_packages': suggested_packages,
+            'typo_details': typo_issues,
+            'typo_severity': max_severity,
+            'typo_count': len(typo_issues)
+        }
+    
     def _evaluate_malicious(self, sc_score: float, critical: int, high: int, mid: int) -> bool:
         """악성코드 여부 판단"""
         if critical >= 1:
@@ -295,148 +517,344 @@ class NPMSecurityChecker:
         else:
             return "LOW"
     
-    def _load_processed_packages(self, output_file: str) -> List[str]:
-        """이미 처리된 패키지 목록 로드 (순서 유지)"""
-        processed = []
-        seen = set()
+    def _open_store(self, output_file: str, store_path: Optional[str] = None) -> ResultStore:
+        """
+        결과 저장소 열기 (비어 있고 예전 방식의 결과 CSV가 있으면 한 번 가져옴)
         
-        try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    package_name = row.get('package_name', '').strip()
-                    if package_name and package_name not in seen:
-                        processed.append(package_name)
-                        seen.add(package_name)
-            
-            if processed:
-                print(f"✓ 이전 진행 상황 발견: {len(processed)}개 패키지 이미 처리됨")
-        except FileNotFoundError:
+        Args:
+            output_file: 결과 CSV 경로 (저장소 내보내기 대상)
+            store_path: 저장소 경로 (기본값: output_file의 확장자를 .sqlite로)
+        """
+        store_path = store_path or os.path.splitext(output_file)[0] + ".sqlite"
+        store = ResultStore(store_path)
+        if len(store) == 0 and os.path.exists(output_file):
+            store.put_many(self._load_all_results(output_file))
+            if len(store):
+                print(f"✓ 기존 결과 CSV를 저장소로 가져옴: {len(store)}개 패키지")
+        
+        if len(store):
+            print(f"✓ 이전 진행 상황 발견: {len(store)}개 패키지 이미 처리됨 ({store_path})")
+        else:
             print(f"✓ 새로운 검사 시작")
+        return store
+    
+    def _check_one(self, package_name: str, delay_between_requests: float = 0.0) -> Dict:
+        """
+        패키지 1개의 보안 점수 + typosquatting 검사 결과를 병합
         
-        return processed
+        Args:
+            package_name: 패키지명
+            delay_between_requests: 두 요청 사이 고정 대기 시간 (초, 순차 모드 전용)
+            
+        Returns:
+            CSV 한 행에 해당하는 병합 결과
+        """
+        # 오프라인 모드: 일괄 조회로 받아 둔 응답이 있으면 그것으로 판정
+        if self.offline:
+            cached = self._cache_get('purl', package_name)
+            if cached is not None and cached[0] == 200:
+                return self._artifact_result(package_name, cached[1])
+        
+        # 보안 점수 확인
+        security_result = self.check_package_security(package_name)
+        
+        # API 속도 제한 고려 (증가된 대기 시간)
+        if delay_between_requests:
+            time.sleep(delay_between_requests)
+        
+        # Typosquatting 확인
+        typo_result = self.check_typosquatting(package_name)
+        
+        return self._combine(package_name, security_result, typo_result)
     
-    def _append_to_csv(self, result: Dict, output_file: str, write_header: bool = False):
-        """결과를 CSV 파일에 추가 저장"""
-        fieldnames = [
-            'package_name', 'version', 'status',
-            'supply_chain_risk_percentage', 'risk_level',
-            'is_malicious', 'is_typosquatting', 'suggested_package', 'all_suggested_packages',
-            'typo_severity', 'typo_count',
-            'critical_issues', 'high_issues', 'mid_issues', 'low_issues', 'total_issues',
-            'supply_chain_score', 'vulnerability_score', 'quality_score', 'overall_score'
-        ]
+    def _combine(self, package_name: str, security_result: Dict, typo_result: Dict) -> Dict:
+        """보안 점수 결과 + typosquatting 결과 → CSV 한 행"""
+        if security_result['status'] == 'success':
+            return {
+                **security_result,
+                **typo_result
+            }
+        return {
+            'package_name': package_name,
+            'status': security_result['status'],
+            'error': security_result.get('error', 'Unknown error'),
+            'is_typosquatting': typo_result.get('is_typosquatting', False),
+            'suggested_package': typo_result.get('suggested_package'),
+            'all_suggested_packages': typo_result.get('all_suggested_packages', []),
+            'typo_severity': typo_result.get('typo_severity'),
+            'typo_count': typo_result.get('typo_count', 0)
+        }
+    
+    def _fetch_purl_batch(self, packages: List[str], retry_count: int = 0) -> Optional[List[Dict]]:
+        """
+        Socket.dev 일괄 조회 (POST /purl?alerts=true, package URL 여러 개를 요청 1건으로)
         
-        mode = 'w' if write_header else 'a'
+        Args:
+            packages: 패키지명 리스트
+            retry_count: 현재 재시도 횟수
+            
+        Returns:
+            아티팩트 목록 (점수 + 경고), 일괄 조회를 쓸 수 없거나 실패하면 None
+        """
+        url = f"{self.socket_base_url}/purl"
+        max_retries = 3
+        payload = {"components": [{"purl": _npm_purl(pkg)} for pkg in packages]}
         
-        with open(output_file, mode, newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            if write_header:
-                writer.writeheader()
+        try:
+            response = self._request("POST", url, params={"alerts": "true"}, json=payload, timeout=60)
+            
+            # Rate limit 처리
+            if response.status_code == 429:
+                if retry_count < max_retries:
+                    self._wait_rate_limit(response)
+                    return self._fetch_purl_batch(packages, retry_count + 1)
+                return None
+            
+            # 엔드포인트 없음/플랜 미지원 → 이후로는 패키지별 조회
+            if response.status_code in (401, 403, 404, 405, 501):
+                if self.batch_available:
+                    print(f"  ⚠️ 일괄(PURL) 조회 사용 불가 (HTTP {response.status_code}). 패키지별 조회로 전환")
+                self.batch_available = False
+                return None
             
-            # all_suggested_packages를 문자열로 변환
-            result_copy = result.copy()
-            if 'all_suggested_packages' in result_copy and isinstance(result_copy['all_suggested_packages'], list):
-                result_copy['all_suggested_packages'] = ', '.join(result_copy['all_suggested_packages'])
+            response.raise_for_status()
+            return _parse_artifacts(response.text)
             
-            writer.writerow(result_copy)
+        except ValueError as e:
+            print(f"  ⚠️ 일괄 조회 응답 형식 오류: {e}. 이번 묶음은 패키지별 조회로 대체")
+            return None
+        except requests.exceptions.RequestException as e:
+            if retry_count < max_retries:
+                print(f"  ⚠️ 일괄 조회 요청 오류. 재시도 중... ({retry_count + 1}/{max_retries})")
+                time.sleep(5)
+                return self._fetch_purl_batch(packages, retry_count + 1)
+            print(f"  ⚠️ 일괄 조회 실패: {e}. 이번 묶음은 패키지별 조회로 대체")
+            return None
+    
+    def _artifact_result(self, package_name: str, artifact: Dict) -> Dict:
+        """
+        PURL 응답 아티팩트 1개 → score/issues 두 엔드포인트를 합친 것과 같은 CSV 한 행
+        
+        supplyChainRisk 범주 경고를 심각도별로 세어 이슈 수로, didYouMean/gptDidYouMean 경고를 typosquatting으로 쓴다.
+        """
+        alerts = artifact.get('alerts') or []
+        counts = {'critical': 0, 'high': 0, 'mid': 0, 'low': 0}
+        for alert in alerts:
+            if alert.get('category') == 'supplyChainRisk':
+                severity = (alert.get('severity') or '').lower()
+                severity = 'mid' if severity in ('middle', 'medium') else severity
+                if severity in counts:
+                    counts[severity] += 1
+        
+        score = artifact.get('score') or {}
+        security_result = self._security_result(
+            package_name, artifact.get('version') or 'latest', score.get('supplyChain', 1.0),
+            counts['critical'], counts['high'], counts['mid'], counts['low'],
+            vulnerability_score=score.get('vulnerability', 1.0),
+            quality_score=score.get('quality', 1.0),
+            overall_score=score.get('overall', 1.0)
+        )
+        
+        # 경고를 issues 엔드포인트 형식으로 맞춰 같은 요약 로직 사용
+        issues = [
+            {'type': alert.get('type', ''),
+             'value': {'severity': alert.get('severity') or '', 'props': alert.get('props') or {}}}
+            for alert in alerts
+        ]
+        return self._combine(package_name, security_result, self._summarize_typo_issues(package_name, issues))
+    
+    def check_packages_batch(self, packages: List[str], delay_between_requests: float = 0.0) -> List[Dict]:
+        """
+        여러 패키지를 일괄 조회 1건으로 검사 (사용 불가/실패 시 패키지별 조회로 대체)
+        
+        Args:
+            packages: 패키지명 리스트
+            delay_between_requests: 패키지별 조회로 대체될 때의 요청 간 대기 시간 (초, 순차 모드 전용)
+            
+        Returns:
+            입력 순서의 병합 결과
+        
+        응답에 빠진 패키지는 미존재로 단정하지 않는다 (응답 잘림, scope 이름 불일치, 미스캔 패키지일 수 있음).
+        PURL 캐시에는 받은 아티팩트(200)만 기록하고, 빠진 패키지는 패키지별 score/issues 조회로 확인한다
+        (404 캐시는 그 경로가 실제로 404를 받았을 때만 기록됨).
+        """
+        results = {}
+        todo = []
+        for pkg in packages:
+            if self.offline:
+                results[pkg] = self._check_one(pkg)  # 캐시 전용 (PURL → score/issues 순)
+                continue
+            cached = self._cache_get('purl', pkg)
+            if cached is not None and cached[0] == 200:
+                results[pkg] = self._artifact_result(pkg, cached[1])
+            else:
+                todo.append(pkg)  # 예전 버전이 남긴 PURL 404 항목도 다시 확인
+        
+        artifacts = self._fetch_purl_batch(todo) if todo and self.batch_available else None
+        if artifacts is None:
+            fallback = todo
+        else:
+            by_name = {}
+            for artifact in artifacts:
+                by_name.setdefault(_artifact_package_name(artifact).lower(), artifact)
+            fallback = []
+            for pkg in todo:
+                artifact = by_name.get(pkg.lower())
+                if artifact is None:
+                    fallback.append(pkg)
+                    continue
+                self._cache_put('purl', pkg, 'latest', 200, artifact)
+                results[pkg] = self._artifact_result(pkg, artifact)
+        
+        # 패키지별 조회: 순차 모드의 고정 대기(score/issues 사이 + 패키지 사이)를 그대로 적용
+        for pkg in fallback:
+            results[pkg] = self._check_one(pkg, delay_between_requests)
+            if delay_between_requests:
+                time.sleep(delay_between_requests)
+        return [results[pkg] for pkg in packages]
+    
+    def _report(self, combined_result: Dict):
+        """검사 결과 1건의 경고/오류 출력"""
+        if combined_result['status'] == 'success':
+            if combined_result.get('is_malicious') or combined_result.get('is_typosquatting'):
+                self._print_alert(combined_result)
+        else:
+            print(f"  ⚠️ 상태: {combined_result['status']} - {combined_result.get('error', '')}")
+            
+            # 보안 점수는 실패했지만 typosquatting은 발견된 경우
+            if combined_result.get('is_typosquatting'):
+                self._print_alert(combined_result)
     
     def bulk_check_packages(self, packages: List[str], output_file: str = "security_results.csv", 
-                           checkpoint_interval: int = 10, delay_between_requests: float = 1.5):
+                           checkpoint_interval: int = 10, delay_between_requests: float = 1.5,
+                           store_path: Optional[str] = None, export_parquet: bool = False):
         """
         여러 패키지를 일괄 검사 (개선된 버전, 순서 유지)
         
+        max_in_flight > 1 이면 그만큼의 검사 요청 단위를 동시에 진행한다. 이때는 고정 대기 대신
+        공유 토큰 버킷(requests_per_minute, Retry-After/RateLimit 헤더)으로 속도를 맞추고,
+        결과는 완료 순서와 관계없이 입력 순서대로 저장한다.
+        batch_size > 1 이면 batch_size개씩 일괄(PURL) 요청 1건으로 검사한다 (요청 단위 = 묶음).
+        
+        결과는 SQLite 저장소(ResultStore)에 checkpoint_interval개씩 트랜잭션 하나로 upsert하고,
+        끝나면 output_file(CSV)로 내보낸다. 강제 종료 후 재실행하면 커밋된 패키지는 건너뛰고
+        나머지만 한 번씩 검사한다.
+        
         Args:
             packages: 검사할 패키지 리스트 (순서 유지)
-            output_file: 결과 저장 파일명
-            checkpoint_interval: 중간 저장 간격
-            delay_between_requests: 요청 간 대기 시간 (초) - 기본 1.5초로 증가
+            output_file: 결과 CSV 파일명 (저장소 내보내기)
+            checkpoint_interval: 중간 저장(커밋) 간격
+            delay_between_requests: 요청 간 대기 시간 (초) - 기본 1.5초로 증가 (순차 모드 전용, 일괄 조회가 패키지별 조회로 대체될 때도 적용)
+            store_path: 결과 저장소 경로 (기본값: output_file의 확장자를 .sqlite로)
+            export_parquet: True면 같은 이름의 .parquet도 내보냄
         """
-        processed_packages = self._load_processed_packages(output_file)
-        processed_set = set(processed_packages)
+        store = self._open_store(output_file, store_path)
+        processed_set = store.processed()
         
         # 이미 처리된 패키지를 제외하고 순서 유지
         remaining_packages = [pkg for pkg in packages if pkg not in processed_set]
         
         if not remaining_packages:
             print("\n✓ 모든 패키지가 이미 처리되었습니다!")
-            results = self._load_all_results(output_file)
-            self._print_statistics(results)
-            return results
+            return self._finish(store, output_file, export_parquet)
         
-        results = []
         total = len(packages)
-        processed_count = len(processed_packages)
+        processed_count = total - len(remaining_packages)
         remaining_count = len(remaining_packages)
+        concurrent = self.max_in_flight > 1
+        fixed_delay = not concurrent and not self.batch_available
         
         print(f"\n{'='*70}")
         print(f"총 {total}개 패키지 보안 검사")
         print(f"이미 처리됨: {processed_count}개")
         print(f"남은 패키지: {remaining_count}개")
-        print(f"요청 간 대기 시간: {delay_between_requests}초")
+        if self.batch_available:
+            print(f"일괄(PURL) 조회: 요청당 {self.batch_size}개")
+        if not fixed_delay:
+            rate = self.rate_limiter.base_rate
+            print(f"동시 검사: {self.max_in_flight}개, 요청 한도: {f'{rate * 60:.0f}회/분' if rate > 0 else '제한 없음'}")
+        else:
+            print(f"요청 간 대기 시간: {delay_between_requests}초")
         print(f"{'='*70}\n")
         
-        write_header = processed_count == 0
+        pending = []  # 아직 커밋하지 않은 결과 (입력 순서)
         
-        for idx, package_name in enumerate(remaining_packages, 1):
+        for idx, (package_name, combined_result) in enumerate(
+                self._iter_results(remaining_packages, delay_between_requests), 1):
             current_total = processed_count + idx
-            print(f"[{current_total}/{total}] 검사 중: {package_name}")
-            
-            # 보안 점수 확인
-            security_result = self.check_package_security(package_name)
+            print(f"[{current_total}/{total}] 검사 완료: {package_name}" if concurrent
+                  else f"[{current_total}/{total}] 검사 중: {package_name}")
+            self._report(combined_result)
+            pending.append(combined_result)
             
-            # API 속도 제한 고려 (증가된 대기 시간)
-            time.sleep(delay_between_requests)
-            
-            # Typosquatting 확인
-            typo_result = self.check_typosquatting(package_name)
-            
-            # 결과 병합
-            if security_result['status'] == 'success':
-                combined_result = {
-                    **security_result,
-                    **typo_result
-                }
-                results.append(combined_result)
-                
-                if combined_result.get('is_malicious') or combined_result.get('is_typosquatting'):
-                    self._print_alert(combined_result)
-            else:
-                combined_result = {
-                    'package_name': package_name,
-                    'status': security_result['status'],
-                    'error': security_result.get('error', 'Unknown error'),
-                    'is_typosquatting': typo_result.get('is_typosquatting', False),
-                    'suggested_package': typo_result.get('suggested_package'),
-                    'all_suggested_packages': typo_result.get('all_suggested_packages', []),
-                    'typo_severity': typo_result.get('typo_severity'),
-                    'typo_count': typo_result.get('typo_count', 0)
-                }
-                results.append(combined_result)
-                print(f"  ⚠️ 상태: {security_result['status']} - {security_result.get('error', '')}")
-                
-                # 보안 점수는 실패했지만 typosquatting은 발견된 경우
-                if combined_result.get('is_typosquatting'):
-                    self._print_alert(combined_result)
-            
-            # 중간 저장
+            # 중간 저장 (묶음 단위 커밋)
             if idx % checkpoint_interval == 0 or idx == remaining_count:
-                start_idx = max(0, len(results) - checkpoint_interval)
-                for result in results[start_idx:]:
-                    self._append_to_csv(result, output_file, write_header)
-                    write_header = False
+                store.put_many(pending)
+                pending = []
                 
                 print(f"💾 중간 저장 완료: {current_total}/{total} ({current_total/total*100:.1f}%)")
             
-            time.sleep(delay_between_requests)  # 추가 대기
+            if fixed_delay:
+                time.sleep(delay_between_requests)  # 추가 대기
         
-        all_results = self._load_all_results(output_file)
+        if self.cache is not None:
+            print(f"🗄️ 응답 캐시: 적중 {self.cache.hits}건, 미적중 {self.cache.misses}건")
+        
+        return self._finish(store, output_file, export_parquet)
+    
+    def _finish(self, store: ResultStore, output_file: str, export_parquet: bool) -> List[Dict]:
+        """저장소 → CSV(/Parquet) 내보내기, 통계 출력 후 전체 결과 반환"""
+        n = store.export_csv(output_file)
+        print(f"📄 결과 내보내기: {output_file} ({n}개)")
+        if export_parquet:
+            parquet_file = os.path.splitext(output_file)[0] + ".parquet"
+            store.export_parquet(parquet_file)
+            print(f"📄 결과 내보내기: {parquet_file} ({n}개)")
+        
+        all_results = store.all_results()
+        store.close()
         self._print_statistics(all_results)
         
         return all_results
     
+    def _iter_results(self, packages: List[str], delay_between_requests: float):
+        """
+        (패키지명, 병합 결과)를 입력 순서대로 생성
+        
+        요청 단위는 패키지 1개(또는 일괄 모드의 묶음 1개). 동시 모드에서는 최대 max_in_flight개를
+        진행 중으로 유지하고, 앞선 단위가 끝나기를 기다리는 동안 뒤 단위들이 먼저 끝나도 순서를
+        지키기 위해 max_in_flight * 2개까지만 미리 제출한다.
+        """
+        delay = delay_between_requests if self.max_in_flight <= 1 else 0.0
+        if self.batch_available:
+            # 도중에 일괄 조회를 쓸 수 없게 되면 남은 묶음은 패키지별 조회 + 같은 고정 대기로 처리됨
+            chunks = [packages[i:i + self.batch_size] for i in range(0, len(packages), self.batch_size)]
+            check = lambda chunk: self.check_packages_batch(chunk, delay)
+        else:
+            chunks = [[pkg] for pkg in packages]
+            check = lambda chunk: [self._check_one(chunk[0], delay)]
+        
+        if self.max_in_flight <= 1:
+            for chunk in chunks:
+                yield from zip(chunk, check(chunk))
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            window = deque()
+            todo = iter(chunks)
+            for chunk in todo:
+                window.append((chunk, executor.submit(check, chunk)))
+                if len(window) >= self.max_in_flight * 2:
+                    break
+            while window:
+                chunk, future = window.popleft()
+                next_chunk = next(todo, None)
+                if next_chunk is not None:
+                    window.append((next_chunk, executor.submit(check, next_chunk)))
+                yield from zip(chunk, future.result())
+    
     def _load_all_results(self, output_file: str) -> List[Dict]:
-        """저장된 모든 결과 로드"""
+        """예전 방식으로 저장된 결과 CSV 로드 (결과 저장소로 가져오기용)"""
         results = []
         
         try:
@@ -511,7 +929,7 @@ class NPMSecurityChecker:
         successful = [r for r in results if r.get('status') == 'success']
         malicious = [r for r in successful if r.get('is_malicious')]
         typosquatting = [r for r in results if r.get('is_typosquatting')]  # 전체 결과에서 검색
-        errors = [r for r in results if r.get('status') in ['timeout', 'error', 'rate_limited']]
+        errors = [r for r in results if r.get('status') in ['timeout', 'error', 'rate_limited', 'not_cached']]
         
         print(f"\n{'='*70}")
         print("검사 결과 요약")
@@ -553,19 +971,31 @@ if __name__ == "__main__":
     OUTPUT_FILE = "npm_security_check_results_marin_socket_dev.csv"
     # ==============================================================
     CHECKPOINT_INTERVAL = 10
+    MAX_IN_FLIGHT = 8            # 동시에 진행할 요청 단위 수 (1 = 기존 순차 처리 + 고정 대기)
+    REQUESTS_PER_MINUTE = 120    # Socket.dev 할당량에 맞춘 분당 요청 수 (패키지별 조회는 패키지당 2건, 0 = 헤더 기준으로만 조절)
+    BATCH_SIZE = 100             # 일괄(PURL) 요청 1건당 패키지 수 (0 = 패키지별 score/issues 조회)
+    CACHE_FILE = "socket_payload_cache.sqlite"  # 모델 간 공유 응답 캐시 (None = 미사용)
+    CACHE_TTL = 7 * 24 * 3600           # 200 응답 유효 시간 (초)
+    CACHE_NEGATIVE_TTL = 24 * 3600      # 404 응답 유효 시간 (초)
+    OFFLINE = False  # True: API 호출 없이 캐시만으로 재판정 (임계값 조정 후 새 OUTPUT_FILE로 실행)
+    EXPORT_PARQUET = False       # 결과 저장소(OUTPUT_FILE의 .sqlite)를 CSV와 함께 .parquet으로도 내보내기
     
-    checker = NPMSecurityChecker(SOCKET_API_TOKEN)
+    checker = NPMSecurityChecker(SOCKET_API_TOKEN, max_in_flight=MAX_IN_FLIGHT,
+                                 requests_per_minute=REQUESTS_PER_MINUTE, batch_size=BATCH_SIZE,
+                                 cache_path=CACHE_FILE, cache_ttl=CACHE_TTL,
+                                 cache_negative_ttl=CACHE_NEGATIVE_TTL, offline=OFFLINE)
     
     print("CSV 파일에서 패키지 추출 중...")
     packages = checker.extract_packages_from_csv(CSV_FILE)
     
     if packages:
-        # delay_between_requests를 2.0초로 설정하여 rate limit 방지
+        # delay_between_requests를 2.0초로 설정하여 rate limit 방지 (순차 모드에서만 사용)
         results = checker.bulk_check_packages(
             packages, 
             output_file=OUTPUT_FILE,
             checkpoint_interval=CHECKPOINT_INTERVAL,
-            delay_between_requests=2.0  # API 요청 간격을 2초로 증가
+            delay_between_requests=2.0,  # API 요청 간격을 2초로 증가
+            export_parquet=EXPORT_PARQUET
         )
         
         print("\n✅ 검사 완료!")
@@ -0,0 +1,140 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, List, Set
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None  # Parquet 내보내기 불가 → CSV만 사용
+
+# -----------------------------
+# 보안 검사 결과 저장소(SQLite)
+#   - 패키지당 1행 upsert (package_name 기본키, 처음 저장된 순서 seq 유지)
+#   - 결과는 JSON 그대로 저장 → 다시 읽을 때 타입 변환 불필요
+#   - put_many 1회 = 트랜잭션 1개: 중간에 kill -9로 죽어도 커밋된 묶음만 남고,
+#     재실행 시 커밋되지 않은 패키지만 다시 검사(upsert라 중복 없음)
+#   - CSV/Parquet은 필요할 때 export_csv / export_parquet로 내보냄
+# -----------------------------
+RESULT_FIELDS = [
+    'package_name', 'version', 'status',
+    'supply_chain_risk_percentage', 'risk_level',
+    'is_malicious', 'is_typosquatting', 'suggested_package', 'all_suggested_packages',
+    'typo_severity', 'typo_count',
+    'critical_issues', 'high_issues', 'mid_issues', 'low_issues', 'total_issues',
+    'supply_chain_score', 'vulnerability_score', 'quality_score', 'overall_score'
+]
+NUMERIC_FIELDS = [
+    'supply_chain_risk_percentage', 'typo_count',
+    'critical_issues', 'high_issues', 'mid_issues', 'low_issues', 'total_issues',
+    'supply_chain_score', 'vulnerability_score', 'quality_score', 'overall_score'
+]
+BOOL_FIELDS = ['is_malicious', 'is_typosquatting']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    package_name TEXT PRIMARY KEY,
+    seq          INTEGER NOT NULL,
+    status       TEXT,
+    data         TEXT NOT NULL,
+    updated_at   REAL NOT NULL
+)
+"""
+
+UPSERT = """
+INSERT INTO results (package_name, seq, status, data, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(package_name) DO UPDATE SET status = excluded.status, data = excluded.data, updated_at = excluded.updated_at
+"""
+
+
+class ResultStore:
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 파일 경로
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL: 프로세스가 죽어도 커밋된 트랜잭션은 보존
+        with self.conn:
+            self.conn.execute(SCHEMA)
+        self._next_seq = self.conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM results").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, package_name: str) -> bool:
+        """기본키 조회로 처리 여부 확인"""
+        return self.conn.execute(
+            "SELECT 1 FROM results WHERE package_name = ?", (package_name,)
+        ).fetchone() is not None
+
+    def processed(self) -> Set[str]:
+        """이미 저장된 패키지명 집합 (남은 패키지 계산용)"""
+        return {row[0] for row in self.conn.execute("SELECT package_name FROM results")}
+
+    def put_many(self, results: Iterable[Dict]):
+        """결과 묶음을 트랜잭션 하나로 upsert (새 패키지는 들어온 순서대로 seq 부여)"""
+        now = time.time()
+        rows = []
+        for result in results:
+            rows.append((result['package_name'], self._next_seq, result.get('status'),
+                         json.dumps(result, ensure_ascii=False, default=str), now))
+            self._next_seq += 1
+        with self.conn:
+            self.conn.executemany(UPSERT, rows)
+
+    def all_results(self) -> List[Dict]:
+        """저장 순서대로 전체 결과"""
+        return [json.loads(row[0]) for row in self.conn.execute("SELECT data FROM results ORDER BY seq")]
+
+    def export_csv(self, csv_path: str) -> int:
+        """기존 결과 CSV와 같은 열/형식으로 내보내기 (추천 패키지 목록은 ', '로 연결), 기록한 행 수 반환"""
+        results = self.all_results()
+        tmp_path = csv_path + '.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for result in results:
+                if isinstance(result.get('all_suggested_packages'), list):
+                    result = {**result, 'all_suggested_packages': ', '.join(result['all_suggested_packages'])}
+                writer.writerow(result)
+        os.replace(tmp_path, csv_path)
+        return len(results)
+
+    def export_parquet(self, parquet_path: str) -> int:
+        """Parquet으로 내보내기 (all_suggested_packages는 list<string> 열), 기록한 행 수 반환"""
+        if pd is None:
+            raise RuntimeError("Parquet 내보내기에는 pandas/pyarrow가 필요합니다")
+        results = self.all_results()
+        df = pd.DataFrame([{field: result.get(field) for field in RESULT_FIELDS} for result in results],
+                          columns=RESULT_FIELDS)
+        # 예전 CSV에서 가져온 행은 값이 문자열('' / 'True')이라 열 타입을 맞춰 준다
+        for field in NUMERIC_FIELDS:
+            df[field] = pd.to_numeric(df[field].replace('', None), errors='coerce')
+        for field in BOOL_FIELDS:
+            df[field] = df[field].map(lambda v: v if isinstance(v, bool) or v is None else str(v) == 'True')
+        df['all_suggested_packages'] = df['all_suggested_packages'].map(
+            lambda v: [p for p in v.split(', ') if p] if isinstance(v, str) else v)
+        tmp_path = parquet_path + '.tmp'
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+        return len(results)
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    # 사용법: python result_store.py <결과 저장소.sqlite> <내보낼 파일.csv|.parquet>
+    if len(sys.argv) != 3:
+        print("사용법: python result_store.py <npm_security_check_results.sqlite> <out.csv|out.parquet>")
+        sys.exit(1)
+    store = ResultStore(sys.argv[1])
+    dst = sys.argv[2]
+    n = store.export_parquet(dst) if dst.endswith('.parquet') else store.export_csv(dst)
+    print(f"내보내기 완료: {dst} ({n} rows)")
@@ -0,0 +1,92 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+# -----------------------------
+# Socket.dev 응답 캐시(SQLite)
+#   - 키: 'package@version' + 종류('score' | 'issues' | 'purl')
+#   - 값: HTTP 상태(200 | 404) + 원본 JSON 본문 + 조회 시각
+#   - 판정이 아니라 원본을 저장하므로 임계값을 바꾼 뒤 캐시만으로 다시 판정할 수 있다
+#   - WAL 모드 + busy timeout → 여러 모델 실행/스레드가 같은 파일을 동시에 사용
+# -----------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    key         TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    http_status INTEGER NOT NULL,
+    body        TEXT,
+    fetched_at  REAL NOT NULL,
+    PRIMARY KEY (key, kind)
+)
+"""
+
+
+def cache_key(package_name: str, version: str = "latest") -> str:
+    return f"{package_name}@{version}"
+
+
+class SocketPayloadCache:
+    def __init__(self, path: str, ttl: float, negative_ttl: float):
+        """
+        Args:
+            path: SQLite 파일 경로 (모델/실행 간 공유)
+            ttl: 200 응답 유효 시간 (초)
+            negative_ttl: 404 응답 유효 시간 (초)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._stat_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.execute(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션 (sqlite3 커넥션은 스레드 간 공유하지 않음)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, kind: str, ignore_ttl: bool = False) -> Optional[Tuple[int, Any]]:
+        """
+        캐시된 (HTTP 상태, JSON 본문) 조회
+
+        Args:
+            key: cache_key(package, version)
+            kind: 'score' | 'issues' | 'purl'
+            ignore_ttl: True면 만료된 항목도 반환 (오프라인 재판정용)
+
+        Returns:
+            TTL 안의 항목이 있으면 (http_status, payload), 없거나 만료됐으면 None
+        """
+        row = self._conn().execute(
+            "SELECT http_status, body, fetched_at FROM payloads WHERE key = ? AND kind = ?", (key, kind)
+        ).fetchone()
+        fresh = row is not None and (
+            ignore_ttl or time.time() - row[2] < (self.ttl if row[0] == 200 else self.negative_ttl)
+        )
+        with self._stat_lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not fresh:
+            return None
+        return row[0], (json.loads(row[1]) if row[1] is not None else None)
+
+    def put(self, key: str, kind: str, http_status: int, payload: Any = None):
+        conn = self._conn()
+        with conn:  # 자동 커밋 (짧은 트랜잭션으로 다른 프로세스 대기 최소화)
+            conn.execute(
+                "INSERT OR REPLACE INTO payloads (key, kind, http_status, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, http_status,
+                 json.dumps(payload, ensure_ascii=False) if payload is not None else None, time.time()),
+            )
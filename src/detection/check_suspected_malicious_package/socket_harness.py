@@ -0,0 +1,237 @@
+import os
+import sys
+import csv
+import json
+import time
+import tempfile
+import threading
+import contextlib
+import io
+import sqlite3
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote, urlparse
+from typing import Dict, List, Optional, Tuple
+from check_by_socket_dev import NPMSecurityChecker
+
+# -----------------------------
+# NPMSecurityChecker 동작 점검 하네스 (로컬 스텁 Socket.dev 서버, 네트워크/토큰 불필요)
+#   - batch_matches_per_package: 일괄(PURL, NDJSON 아티팩트) 모드의 CSV 행이 패키지별 score/issues 모드와 같은지
+#                                (scope 이름, 점수, 심각도별 이슈 수, didYouMean/gptDidYouMean 매핑 포함),
+#                                응답에 빠진 패키지는 404로 캐시하지 않고 패키지별 조회로 확인하는지
+#   - purl_fallback_delay: 일괄(PURL) 엔드포인트가 404일 때 패키지별 score/issues 조회로 넘어가도
+#                          순차 모드(max_in_flight=1, requests_per_minute=0)의 고정 대기가 지켜지는지
+#
+#   스텁 패키지 이름 규칙: missing* = 없음(404, 일괄 응답에서도 빠짐), unscanned* = 있지만 일괄 응답에서 빠짐,
+#                          bad = 낮은 공급망 점수 + high 이슈 2건, typo = didYouMean, gpt = gptDidYouMean
+#
+#   사용법: python socket_harness.py   (실패한 점검이 있으면 종료 코드 1)
+# -----------------------------
+FALLBACK_DELAY = 0.2     # 점검에 쓰는 delay_between_requests (초)
+FALLBACK_PACKAGES = ['express', 'axios', 'lodash', 'chalk', 'missing-pkg', '@scope/typo-pkg']
+TIMING_SLACK = 0.9       # sleep 오차 허용 (대기 시간의 90% 이상이면 통과)
+BATCH_PACKAGES = ['express', 'bad-actor', 'reqeusts-typo', '@scope/typo-pkg', 'gpt-lookalike', 'missing-pkg',
+                  '@acme/bad-typo', 'unscanned-pkg', 'lodash', '@acme/missing-scoped']
+BATCH_SIZE = 4
+STUB_VERSION = '1.2.3'   # 일괄 응답 아티팩트의 버전 (패키지별 모드는 'latest'라 비교에서 제외)
+
+
+# -----------------------------
+# 스텁 Socket.dev 서버
+# -----------------------------
+def _stub_package(name: str) -> Optional[Dict]:
+    """패키지 이름 규칙 → 점수/경고 (없는 패키지면 None)"""
+    if name.split('/')[-1].startswith('missing'):
+        return None
+    bad = 'bad' in name
+    alerts = [{'type': 'malware', 'category': 'supplyChainRisk', 'severity': 'high'} for _ in range(2 if bad else 0)]
+    alerts.append({'type': 'unmaintained', 'category': 'maintenance', 'severity': 'low'})
+    if 'typo' in name:
+        alerts.append({'type': 'didYouMean', 'category': 'supplyChainRisk', 'severity': 'critical',
+                       'props': {'alternatePackage': 'requests'}})
+    if 'gpt' in name:
+        alerts.append({'type': 'gptDidYouMean', 'category': 'quality', 'severity': 'middle',
+                       'props': {'alternatePackage': 'lodash'}})
+    return {
+        'supplyChain': 0.25 if bad else 0.9, 'vulnerability': 0.95, 'quality': 0.7, 'overall': 0.6,
+        'alerts': alerts,
+    }
+
+
+def _severity_count(alerts: List[Dict], severity: str) -> int:
+    names = {'mid': ('middle', 'medium')}.get(severity, (severity,))
+    return sum(a['category'] == 'supplyChainRisk' and a['severity'] in names for a in alerts)
+
+
+def start_stub_socket(purl_status: int = 200) -> Tuple[ThreadingHTTPServer, str, List[Tuple[float, str, str]]]:
+    """
+    GET /v0/npm/<패키지>/latest/score|issues 와 POST /v0/purl(NDJSON 아티팩트)을 흉내 내는 로컬 서버
+    purl_status가 200이 아니면 일괄 엔드포인트는 그 상태로만 응답한다.
+
+    Returns:
+        (서버, base URL, 요청 기록 [(monotonic 시각, 메서드, 경로)])
+    """
+    log = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, code: int, body, content_type: str = 'application/json'):
+            data = (body if isinstance(body, str) else json.dumps(body)).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _record(self):
+            with lock:
+                log.append((time.monotonic(), self.command, unquote(urlparse(self.path).path)))
+
+        def do_POST(self):
+            self._record()
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if purl_status != 200:
+                return self._send(purl_status, {'error': {'message': 'not available'}})
+            lines = []
+            for component in body.get('components', []):
+                purl = unquote(component['purl'])[len('pkg:npm/'):]
+                info = _stub_package(purl)
+                if info is None or 'unscanned' in purl:
+                    continue  # 없는/미스캔 패키지는 응답에서 빠짐
+                namespace, _, name = purl.rpartition('/')
+                artifact = {'type': 'npm', 'name': name, 'version': STUB_VERSION,
+                            'score': {k: info[k] for k in ('supplyChain', 'vulnerability', 'quality', 'overall')},
+                            'alerts': info['alerts']}
+                if namespace:
+                    artifact['namespace'] = namespace
+                lines.append(json.dumps(artifact))
+            self._send(200, '\n'.join(lines), 'application/x-ndjson')
+
+        def do_GET(self):
+            self._record()
+            parts = unquote(urlparse(self.path).path).split('/')  # ['', 'v0', 'npm', ..., 'latest', kind]
+            info = _stub_package('/'.join(parts[3:-2]))
+            if info is None:
+                return self._send(404, {})
+            alerts = info['alerts']
+            if parts[-1] == 'score':
+                return self._send(200, {
+                    'supplyChainRisk': {
+                        'score': info['supplyChain'],
+                        'supplyChainRiskIssueCritical': _severity_count(alerts, 'critical'),
+                        'supplyChainRiskIssueHigh': _severity_count(alerts, 'high'),
+                        'supplyChainRiskIssueMid': _severity_count(alerts, 'mid'),
+                        'supplyChainRiskIssueLow': _severity_count(alerts, 'low'),
+                    },
+                    'vulnerability': {'score': info['vulnerability']},
+                    'quality': {'score': info['quality']},
+                    'depscore': info['overall'],
+                })
+            self._send(200, [{'type': a['type'], 'value': {'severity': a['severity'], 'props': a.get('props', {})}}
+                             for a in alerts])
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/v0", log
+
+
+def _run_bulk(packages: List[str], out_dir: str, purl_status: int = 200, delay: float = 0.0,
+              **checker_kwargs) -> Tuple[List[Dict], List[Tuple[float, str, str]]]:
+    """스텁 서버로 bulk_check_packages 1회 실행 → (결과 CSV 행, 요청 기록)"""
+    srv, base_url, log = start_stub_socket(purl_status)
+    try:
+        checker = NPMSecurityChecker("stub-token", max_in_flight=1, requests_per_minute=0,
+                                     socket_base_url=base_url, **checker_kwargs)
+        output_file = os.path.join(out_dir, 'results.csv')
+        with contextlib.redirect_stdout(io.StringIO()):
+            checker.bulk_check_packages(packages, output_file, delay_between_requests=delay)
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    with open(output_file, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f)), log
+
+
+# -----------------------------
+# 점검
+# -----------------------------
+def check_batch_matches_per_package() -> Dict:
+    """같은 패키지를 일괄 모드/패키지별 모드로 검사한 CSV 행 비교 (version 열 제외)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        per_dir, batch_dir = os.path.join(tmp, 'per'), os.path.join(tmp, 'batch')
+        os.makedirs(per_dir)
+        os.makedirs(batch_dir)
+        cache_path = os.path.join(tmp, 'socket_cache.sqlite')
+        per_rows, _ = _run_bulk(BATCH_PACKAGES, per_dir)
+        batch_rows, log = _run_bulk(BATCH_PACKAGES, batch_dir, batch_size=BATCH_SIZE, cache_path=cache_path)
+        conn = sqlite3.connect(cache_path)
+        purl_404 = conn.execute("SELECT COUNT(*) FROM payloads WHERE kind = 'purl' AND http_status != 200").fetchone()[0]
+        conn.close()
+
+    strip = lambda rows: [{k: v for k, v in row.items() if k != 'version'} for row in rows]
+    mismatched = [p['package_name'] for p, b in zip(strip(per_rows), strip(batch_rows)) if p != b]
+    omitted = [pkg for pkg in BATCH_PACKAGES if 'missing' in pkg or 'unscanned' in pkg]
+    posts = sum(method == 'POST' for _, method, _ in log)
+    gets = {path.rsplit('/', 2)[0][len('/v0/npm/'):] for _, method, path in log if method == 'GET'}
+    artifact_rows = [b for b in batch_rows if b['package_name'] not in omitted]
+    by_name = {row['package_name']: row for row in batch_rows}
+    ok = (len(per_rows) == len(batch_rows) == len(BATCH_PACKAGES) and not mismatched
+          and posts == -(-len(BATCH_PACKAGES) // BATCH_SIZE) and gets == set(omitted) and purl_404 == 0
+          and all(row['version'] == STUB_VERSION for row in artifact_rows)
+          and by_name['unscanned-pkg']['status'] == 'success'
+          and by_name['@acme/missing-scoped']['status'] == 'not_found'
+          and by_name['@scope/typo-pkg']['is_typosquatting'] == 'True'
+          and by_name['gpt-lookalike']['suggested_package'] == 'lodash'
+          and by_name['bad-actor']['is_malicious'] == 'True')
+    return {
+        'ok': ok,
+        'detail': f"행 {len(batch_rows)}/{len(per_rows)}개, 불일치 {mismatched or '없음'}, purl 요청 {posts}건, "
+                  f"패키지별 조회 {sorted(gets)}, PURL 404 캐시 {purl_404}건",
+    }
+
+
+def check_purl_fallback_delay() -> Dict:
+    """PURL 404 → 패키지별 조회로 대체된 요청들 사이 간격이 FALLBACK_DELAY 이상인지"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rows, log = _run_bulk(FALLBACK_PACKAGES, tmp, purl_status=404, delay=FALLBACK_DELAY,
+                              batch_size=len(FALLBACK_PACKAGES) // 2)
+
+    gets = [t for t, method, _ in log if method == 'GET']
+    gaps = [b - a for a, b in zip(gets, gets[1:])]
+    posts = sum(method == 'POST' for _, method, _ in log)
+    min_gap = min(gaps, default=0.0)
+    ok = (posts == 1 and len(gets) == 2 * len(FALLBACK_PACKAGES) and len(rows) == len(FALLBACK_PACKAGES)
+          and min_gap >= FALLBACK_DELAY * TIMING_SLACK)
+    return {
+        'ok': ok,
+        'detail': f"purl 요청 {posts}건, score/issues 요청 {len(gets)}건, 결과 {len(rows)}개, "
+                  f"최소 간격 {min_gap:.3f}s (기대 ≥ {FALLBACK_DELAY}s)",
+    }
+
+
+CHECKS = {
+    'batch_matches_per_package': check_batch_matches_per_package,
+    'purl_fallback_delay': check_purl_fallback_delay,
+}
+
+
+def main() -> int:
+    failed = []
+    for name, check in CHECKS.items():
+        result = check()
+        print(f"[{'OK' if result['ok'] else 'FAIL'}] {name}: {result['detail']}")
+        if not result['ok']:
+            failed.append(name)
+    if failed:
+        print(f"실패한 점검: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import os, sys, json, time, random, platform, subprocess
+from typing import Callable, Dict, List, Tuple
+import prompt_detection as pdet
+
+# -----------------------------
+# 추출 전략/정규화 마이크로 벤치마크
+#   합성 응답 생성기로 실제와 비슷한 모양(긴 산문, 코드블록 다수, 거대한 쉼표 목록,
+#   JSON 배열, import/require, npm install, 글머리표)을 만들고
+#   함수별 처리량(응답/초, MB/초)을 측정해 BENCH_HISTORY_FILE(JSONL)에 누적한다.
+#   직전 기록과 비교한 변화율도 함께 출력 → 20k행 실행 전에 추출 회귀를 확인.
+#
+#   사용법: python bench_extraction.py [벤치 이름 일부 ...]
+#           (인자를 주면 이름에 그 문자열이 들어간 벤치만 실행)
+# -----------------------------
+N_RESPONSES = 2000      # 모양별 합성 응답 수
+REPEAT = 5              # 반복 측정 후 최솟값 사용
+SEED = 20250101
+BENCH_HISTORY_FILE = "bench_history.jsonl"
+
+PACKAGES = ['express', 'axios', 'lodash', 'react', 'react-dom', 'chalk', 'commander', 'moment', 'date-fns',
+            '@babel/core', '@types/node', 'vue', 'socket.io', 'node-fetch', 'left-pad', 'js-yaml', 'uuid',
+            'dotenv', 'mongoose', 'jsonwebtoken', 'bcrypt', 'webpack', 'eslint', 'jest', 'typescript']
+NOISE = ['commander.js', 'Express.js', '`axios`', '"lodash"', 'react-dom/server', '@scope', 'fs', 'path',
+         'Promise', 'foo_bar', 'Hello World', 'lodash@4.17.21', 'npm:chalk', 'https://npmjs.com/package/uuid']
+WORDS = ('the a package module install use with for your project this library provides support '
+         'server client request response async function data config build test run').split()
+
+SYSTEM_PROMPTS = [
+    "Return a JSON array of npm package names only.",
+    "List the packages comma-separated, no explanations.",
+    "One package per line, nothing else.",
+    "Show the npm install command.",
+    "Answer with import statements.",
+    "Give a bullet list of packages.",
+    "Just answer the question.",
+]
+
+# -----------------------------
+# 합성 응답 생성기
+# -----------------------------
+def _pkg(rng: random.Random) -> str:
+    return rng.choice(NOISE) if rng.random() < 0.15 else rng.choice(PACKAGES)
+
+def _sentence(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + '.'
+
+def gen_prose(rng):
+    paras = []
+    for _ in range(rng.randint(6, 12)):
+        s = ' '.join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+        paras.append(s.replace('package', f"`{_pkg(rng)}`", 1))
+    return '\n\n'.join(paras)
+
+def gen_fenced(rng):
+    parts = []
+    for _ in range(rng.randint(4, 10)):
+        parts.append(_sentence(rng))
+        lines = [f"const x{i} = require('{_pkg(rng)}');" for i in range(rng.randint(2, 6))]
+        parts.append("```js\n" + '\n'.join(lines) + "\n```")
+    return '\n'.join(parts)
+
+def gen_comma_huge(rng):
+    return ', '.join(_pkg(rng) for _ in range(rng.randint(200, 600)))
+
+def gen_json_array(rng):
+    arr = json.dumps([_pkg(rng) for _ in range(rng.randint(50, 300))])
+    return f"Here are the packages:\n{arr}\nHope this helps."
+
+def gen_newline(rng):
+    return '\n'.join(_pkg(rng) for _ in range(rng.randint(10, 80)))
+
+def gen_imports(rng):
+    lines = []
+    for i in range(rng.randint(10, 40)):
+        p = _pkg(rng)
+        lines.append(rng.choice([f"import {p.replace('-', '_')} from '{p}';", f"const m{i} = require(\"{p}\");",
+                                 f"import '{p}';", f"import {{ a{i} }} from '{p}'"]))
+    return "```js\n" + '\n'.join(lines) + "\n```\n" + _sentence(rng)
+
+def gen_npm_install(rng):
+    lines = [_sentence(rng)]
+    for _ in range(rng.randint(2, 6)):
+        flags = rng.choice(['', '--save ', '-D ', '--save-dev '])
+        lines.append(f"npm install {flags}" + ' '.join(_pkg(rng) for _ in range(rng.randint(1, 5))))
+    return '\n'.join(lines)
+
+def gen_bullets(rng):
+    return '\n'.join(f"{rng.choice(['-', '*', '1.', '2)'])} {_pkg(rng)} - {_sentence(rng)}"
+                     for _ in range(rng.randint(5, 25)))
+
+SHAPES: Dict[str, Callable[[random.Random], str]] = {
+    'prose': gen_prose, 'fenced': gen_fenced, 'comma_huge': gen_comma_huge, 'json_array': gen_json_array,
+    'newline': gen_newline, 'imports': gen_imports, 'npm_install': gen_npm_install, 'bullets': gen_bullets,
+}
+
+def make_corpus(shape: str, n: int = N_RESPONSES, seed: int = SEED) -> List[str]:
+    rng = random.Random(f"{seed}:{shape}")
+    return [SHAPES[shape](rng) for _ in range(n)]
+
+def make_mixed(n: int = N_RESPONSES, seed: int = SEED) -> Tuple[List[str], List[str]]:
+    """(system_prompts, responses): 모양을 섞은 전체 파이프라인용 코퍼스"""
+    rng = random.Random(f"{seed}:mixed")
+    shapes = list(SHAPES)
+    rps = [SHAPES[rng.choice(shapes)](rng) for _ in range(n)]
+    sps = [rng.choice(SYSTEM_PROMPTS) for _ in range(n)]
+    return sps, rps
+
+# -----------------------------
+# 벤치 정의: (이름, 입력 목록, 입력 1개를 처리하는 함수 또는 목록 전체를 처리하는 함수, 반복 전 준비)
+# -----------------------------
+def _per_item(fn):
+    def run(items):
+        for x in items: fn(x)
+    return run
+
+def build_benches() -> List[Tuple[str, List[str], Callable[[List[str]], None], Callable[[], None]]]:
+    corpora = {shape: make_corpus(shape) for shape in SHAPES}
+    tokens = [t for text in corpora['comma_huge'][:200] for t in text.split(', ')]
+    tokens += [t for text in corpora['json_array'][:200] for t in json.loads(text.splitlines()[1])]
+    prompts = [f"{SYSTEM_PROMPTS[i % len(SYSTEM_PROMPTS)]} (case {i})" for i in range(N_RESPONSES)]
+    sps, rps = make_mixed()
+    noop = lambda: None
+    clear_norm = pdet._normalize_cached.cache_clear
+    clear_choose = pdet.choose_strategy.cache_clear
+    benches = [
+        ('strip_codeblocks/fenced', corpora['fenced'], _per_item(pdet.strip_codeblocks), noop),
+        ('strip_codeblocks/prose', corpora['prose'], _per_item(pdet.strip_codeblocks), noop),
+        ('strat_comma/comma_huge', corpora['comma_huge'], _per_item(pdet.strat_comma), noop),
+        ('strat_comma/prose', corpora['prose'], _per_item(pdet.strat_comma), noop),
+        ('strat_newline/newline', corpora['newline'], _per_item(pdet.strat_newline), noop),
+        ('strat_json/json_array', corpora['json_array'], _per_item(pdet.strat_json), noop),
+        ('strat_import/imports', corpora['imports'], _per_item(pdet.strat_import), noop),
+        ('strat_import/fenced', corpora['fenced'], _per_item(pdet.strat_import), noop),
+        ('strat_npm_install/npm_install', corpora['npm_install'], _per_item(pdet.strat_npm_install), noop),
+        ('strat_bullet/bullets', corpora['bullets'], _per_item(pdet.strat_bullet), noop),
+        ('normalize_npm_name/uncached', tokens, _per_item(pdet._normalize_npm_name), noop),
+        ('normalize_npm_name/warm', tokens, _per_item(pdet.normalize_npm_name), noop),
+        ('choose_strategy/cold', prompts, _per_item(pdet.choose_strategy), clear_choose),
+        ('choose_strategy/warm', prompts, _per_item(pdet.choose_strategy), noop),
+        ('parse_rows/mixed', rps, lambda items: pdet.parse_rows(sps, items), clear_norm),
+    ]
+    return benches
+
+def measure(items: List[str], run: Callable[[List[str]], None], setup: Callable[[], None], repeat: int = REPEAT) -> Dict:
+    nbytes = sum(len(x.encode('utf-8')) for x in items)
+    best = float('inf')
+    for _ in range(repeat):
+        setup()
+        t0 = time.perf_counter()
+        run(items)
+        best = min(best, time.perf_counter() - t0)
+    return {
+        'items': len(items),
+        'bytes': nbytes,
+        'best_s': best,
+        'items_per_s': len(items) / best,
+        'mb_per_s': nbytes / best / 1e6,
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except Exception:
+        return ''
+
+def last_history(path: str) -> Dict[str, Dict]:
+    """벤치 이름 → 가장 최근 측정값(일부 벤치만 돌린 기록도 반영)"""
+    last: Dict[str, Dict] = {}
+    if not os.path.exists(path):
+        return last
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                last.update(json.loads(line).get('results', {}))
+            except ValueError:
+                continue
+    return last
+
+def main(filters: List[str]):
+    prev = last_history(BENCH_HISTORY_FILE)
+    results = {}
+    print(f"{'벤치':<32s}{'items/s':>14s}{'MB/s':>10s}{'직전 대비':>12s}")
+    for name, items, run, setup in build_benches():
+        if filters and not any(f in name for f in filters):
+            continue
+        r = measure(items, run, setup)
+        results[name] = r
+        delta = ''
+        if name in prev and prev[name].get('items_per_s'):
+            delta = f"{r['items_per_s'] / prev[name]['items_per_s'] - 1:+.1%}"
+        print(f"{name:<32s}{r['items_per_s']:>14,.0f}{r['mb_per_s']:>10.1f}{delta:>12s}")
+
+    entry = {
+        'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'n_responses': N_RESPONSES,
+        'repeat': REPEAT,
+        'seed': SEED,
+        'results': results,
+    }
+    with open(BENCH_HISTORY_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"기록 추가: {BENCH_HISTORY_FILE}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
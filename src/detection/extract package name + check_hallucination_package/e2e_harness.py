@@ -0,0 +1,368 @@
+import os, re, sys, json, time, hashlib, argparse, threading, tempfile, contextlib, io
+import pandas as pd
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+from typing import Dict, List, Optional, Set, Tuple
+import prompt_detection as pdet
+from run_metrics import RunMetrics
+import bench_extraction
+
+# -----------------------------
+# 탐지 파이프라인 종단 간(E2E) 처리량/정확도 회귀 하네스
+#   - 레지스트리: 로컬 스텁(http.server 스레드, NPM_REGISTRY를 그쪽으로 돌림) → 네트워크 무관, 재현 가능
+#   - 시나리오
+#       ref:<파일>  체크인된 기준 결과(data/results/analysis)에서 입력 CSV를 재구성해 실행하고
+#                   추출 키워드 집합/라인/판정이 기준과 얼마나 일치하는지 측정.
+#                   라인마다 응답 모양(쉼표/JSON/줄바꿈/npm install/import/글머리표/fallback)과
+#                   그에 맞는 system prompt를 번갈아 써서 전략별 추출 회귀도 일치도에 드러나게 한다.
+#                   다만 모양은 합성이므로 실제 응답에 대한 정확도 기준은 input 시나리오.
+#       synthetic   bench_extraction의 혼합 합성 코퍼스(N행)로 단계별 처리량 측정
+#       input       실제 응답 CSV(--input)를 돌리고 --reference 결과와 비교(실제 정확도 기준)
+#   - 단계별 rows/s, keywords/s는 prompt_detection의 METRICS_FILE에서 계산
+#   - 결과 지문(keyword/라인/판정 해시)을 E2E_HISTORY_FILE에 누적 → 직전 실행과 달라지면 표시,
+#     --check 이면 종료 코드 1 (추출 최적화가 판정을 바꾸지 않았음을 증명하는 용도)
+#   - 오류 판정 재확인 점검: 레지스트리 장애(스텁 503) 중 실행 → 복구 후 재개 실행에서
+#     오류였던 키워드를 모두 다시 조회하는지 확인(실패하면 항상 종료 코드 1)
+#
+#   사용법: python e2e_harness.py [--synthetic-rows N] [--input 응답.csv --reference 기준.csv] [--check]
+# -----------------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+REFERENCE_DIR = os.path.join(REPO_ROOT, 'data', 'results', 'analysis')
+REFERENCE_FILES = ["FINAL_verified_npm_by_system .csv", "FINAL_verified_libraries_v7.csv"]
+SYNTHETIC_ROWS = 20000
+RECHECK_ROWS = 200       # 오류 판정 재확인 점검에 쓰는 합성 코퍼스 행 수
+OUTAGE_STATUS = 503      # 장애 중인 스텁 레지스트리의 응답 상태
+E2E_HISTORY_FILE = "e2e_history.jsonl"
+RECONSTRUCT_PROMPT = "List the npm packages comma-separated, no explanations."
+FILLER_RESPONSE = "none"  # 기준에 키워드가 없는 라인(NULL 토큰 → 후보 없음, 빈 응답은 'nan'으로 추출되므로 피함)
+# 쉼표 외 모양에 넣어도 토큰이 그대로 추출되는 키워드(따옴표/공백/쉼표 없음, 숫자·'-'로 시작하지 않음)
+SHAPE_SAFE_RE = re.compile(r"^[@A-Za-z_][@\w./-]*$")
+
+def _render_import(kws: List[str]) -> str:
+    lines = [f"const m{i} = require('{kw}');" if i % 2 else f"import '{kw}';" for i, kw in enumerate(kws)]
+    return "```js\n" + "\n".join(lines) + "\n```\nRun it with node."
+
+# 재구성 모양: (이름, system prompt(choose_strategy가 해당 전략을 고르게), 키워드 목록 → 응답)
+#   fallback: 글머리표 지시에 쉼표 응답 → strat_bullet 결과가 비어 strat_fallback 경로를 탄다
+RECONSTRUCT_SHAPES = [
+    ('comma', RECONSTRUCT_PROMPT, lambda kws: ' ' + ', '.join(kws)),
+    ('json', "Return a JSON array of npm package names only.",
+     lambda kws: f"Here are the packages:\n{json.dumps(kws)}\nHope this helps."),
+    ('newline', "Write each on a new line, nothing else.", lambda kws: ' ' + '\n'.join(kws)),
+    ('npm_install', "Reply with the npm install line only.",  # "command"에는 'comma'가 들어 있어 쉼표 전략이 골라짐
+     lambda kws: "Install them with:\nnpm install --save " + ' '.join(kws)),
+    ('import', "Answer with import statements.", _render_import),
+    ('bullet', "Give a bullet list of packages.",
+     lambda kws: '\n'.join(f"{'-*'[i % 2]} {kw} - useful for this task" for i, kw in enumerate(kws))),
+    ('fallback', "Give a bullet list of packages.", lambda kws: ' ' + ', '.join(kws)),
+]
+
+# 단계 → 처리량 분모(prompt_detection 지표의 카운터 이름)
+STAGE_UNITS = {
+    'load': 'rows', 'build_expected': 'rows', 'checkpoint_load': 'keywords', 'validation': 'keywords',
+    'registry': 'registry_keywords', 'checkpoint': 'keywords', 'suggest': 'keywords', 'save': 'keywords',
+    'diff': 'keywords',
+}
+
+# -----------------------------
+# 스텁 레지스트리
+# -----------------------------
+def start_stub_registry(known: Set[str], fail_status: Optional[int] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """known에 있는 이름은 200, 나머지는 404를 돌려주는 로컬 레지스트리(fail_status가 있으면 모두 그 상태)"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, body: bool):
+            name = unquote(self.path.lstrip('/'))
+            ok = name in known and fail_status is None
+            data = json.dumps({'name': name, 'dist-tags': {'latest': '1.0.0'}} if ok
+                              else {'error': 'Not found'}).encode('utf-8')
+            self.send_response(200 if ok else fail_status or 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            if body:
+                self.wfile.write(data)
+
+        def do_GET(self): self._reply(True)
+        def do_HEAD(self): self._reply(False)
+        def log_message(self, *args): pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128  # 동시 커넥션(REGISTRY_MAX_INFLIGHT)이 listen 대기열을 넘지 않게
+
+    srv = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+# -----------------------------
+# 기준 결과 로드 / 입력 재구성
+# -----------------------------
+def load_reference(path: str) -> pd.DataFrame:
+    """keyword, line_numbers(list), classification, exists(bool) — 'nan' 같은 키워드가 NaN이 되지 않게 읽는다"""
+    ref = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    out = pd.DataFrame({'keyword': ref['keyword'].str.strip()})
+    out['line_numbers'] = ref['line_numbers'].apply(pdet.parse_line_list)
+    out['classification'] = ref['classification']
+    if 'exists' in ref.columns:
+        out['exists'] = ref['exists'].str.lower() == 'true'
+    else:
+        out['exists'] = ref['classification'] == 'NPM Package'
+    return out
+
+def reconstruct_input(ref: pd.DataFrame, path: str) -> Dict[str, int]:
+    """
+    기준 결과의 (keyword, line) 쌍으로 응답 CSV를 재구성, 모양별 행 수 반환.
+    라인 번호로 RECONSTRUCT_SHAPES를 돌아가며 고르고, SHAPE_SAFE_RE에 맞지 않는 키워드가 있는 라인은 쉼표 모양.
+    응답이 'nan' 하나뿐이면 read_csv가 결측으로 읽으므로 앞에 공백을 둔다(추출 시 strip됨).
+    """
+    by_line: Dict[int, List[str]] = {}
+    for kw, lines in zip(ref['keyword'], ref['line_numbers']):
+        for ln in lines:
+            by_line.setdefault(ln, []).append(kw)
+    n_rows = max(by_line, default=1) - 1
+    prompts = [RECONSTRUCT_PROMPT] * n_rows
+    responses = [FILLER_RESPONSE] * n_rows
+    shape_rows: Dict[str, int] = {}
+    for ln, kws in by_line.items():
+        shape, prompt, render = RECONSTRUCT_SHAPES[ln % len(RECONSTRUCT_SHAPES)]
+        if not all(SHAPE_SAFE_RE.match(kw) for kw in kws):
+            shape, prompt, render = RECONSTRUCT_SHAPES[0]
+        prompts[ln - 2] = prompt
+        responses[ln - 2] = render(kws)
+        shape_rows[shape] = shape_rows.get(shape, 0) + 1
+    pd.DataFrame({pdet.SYSTEM_COL: prompts, pdet.RESPONSE_COL: responses}) \
+        .to_csv(path, index=False, encoding='utf-8-sig')
+    return shape_rows
+
+def synthetic_input(n_rows: int, path: str) -> Set[str]:
+    """bench_extraction 혼합 코퍼스로 입력 CSV 생성, 스텁이 '존재'로 답할 이름 집합 반환"""
+    sps, rps = bench_extraction.make_mixed(n_rows)
+    pd.DataFrame({pdet.SYSTEM_COL: sps, pdet.RESPONSE_COL: rps}).to_csv(path, index=False, encoding='utf-8-sig')
+    return set(bench_extraction.PACKAGES)
+
+# -----------------------------
+# 실행 / 비교
+# -----------------------------
+def run_pipeline(input_file: str, out_dir: str, known: Set[str], resume: bool = False,
+                 fail_status: Optional[int] = None) -> Tuple[pd.DataFrame, Dict, float]:
+    """스텁 레지스트리로 prompt_detection.main()을 1회 실행 → (최종 결과, 지표, 벽시계 시간)"""
+    os.makedirs(out_dir, exist_ok=True)
+    srv, url = start_stub_registry(known, fail_status)
+    cwd = os.getcwd()
+    pdet.INPUT_FILE = input_file
+    pdet.OUTPUT_FILE = os.path.join(out_dir, 'final.csv')
+    pdet.OUTPUT_FORMAT = 'csv'
+    pdet.METRICS_FILE = os.path.join(out_dir, 'metrics.json')
+    pdet.NPM_REGISTRY = url
+    pdet.REGISTRY_CACHE_FILE = None
+    pdet.RESUME = resume
+    pdet.metrics = RunMetrics()
+    pdet.registry_stats = pdet.RegistryStats()
+    pdet._cache = None
+    log = io.StringIO()
+    try:
+        os.chdir(out_dir)  # Diff 리포트는 현재 디렉터리에 생성됨
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(log):
+            pdet.main()
+        wall = time.perf_counter() - t0
+    finally:
+        os.chdir(cwd)
+        srv.shutdown()
+        srv.server_close()
+    with open(os.path.join(out_dir, 'stdout.txt'), 'w', encoding='utf-8') as f:
+        f.write(log.getvalue())
+    final_df = pd.read_csv(pdet.OUTPUT_FILE, dtype={'keyword': str}, keep_default_na=False)
+    final_df['line_numbers'] = final_df['line_numbers'].apply(pdet.parse_line_list)
+    with open(pdet.METRICS_FILE, encoding='utf-8') as f:
+        return final_df, json.load(f), wall
+
+def fingerprint(final_df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    for kw, lines, cls in sorted(zip(final_df['keyword'], final_df['line_numbers'], final_df['classification'])):
+        h.update(f"{kw}\x00{lines}\x00{cls}\n".encode('utf-8'))
+    return h.hexdigest()
+
+def stage_rates(metrics: Dict) -> Dict[str, Dict[str, float]]:
+    counters = metrics.get('counters', {})
+    rates = {}
+    for name, st in metrics.get('stages', {}).items():
+        unit = STAGE_UNITS.get(name, 'keywords')
+        n = counters.get(unit, 0)
+        rates[name] = {'wall_s': st['wall_s'], 'unit': unit, 'per_s': n / st['wall_s'] if st['wall_s'] > 0 else 0.0}
+    return rates
+
+def agreement(ref: pd.DataFrame, final_df: pd.DataFrame) -> Dict:
+    """기준 키워드(현재 정규화 규칙 적용) 대비 추출 집합/라인/판정 일치도"""
+    ref_norm: Dict[str, Dict] = {}
+    drift = []
+    for kw, lines, cls in zip(ref['keyword'], ref['line_numbers'], ref['classification']):
+        norm, _ = pdet.normalize_npm_name(kw)
+        if norm != kw:
+            drift.append(kw)
+        if norm:
+            row = ref_norm.setdefault(norm, {'lines': set(), 'classification': cls})
+            row['lines'] |= set(lines)
+    got = {kw: {'lines': set(lines), 'classification': cls}
+           for kw, lines, cls in zip(final_df['keyword'], final_df['line_numbers'], final_df['classification'])}
+    both = sorted(set(ref_norm) & set(got))
+    only_ref = sorted(set(ref_norm) - set(got))
+    only_got = sorted(set(got) - set(ref_norm))
+    union = len(set(ref_norm) | set(got)) or 1
+    same_lines = [kw for kw in both if ref_norm[kw]['lines'] == got[kw]['lines']]
+    same_cls = [kw for kw in both if ref_norm[kw]['classification'] == got[kw]['classification']]
+    return {
+        'reference_keywords': len(ref_norm),
+        'extracted_keywords': len(got),
+        'jaccard': len(both) / union,
+        'recall': len(both) / (len(ref_norm) or 1),
+        'precision': len(both) / (len(got) or 1),
+        'line_agreement': len(same_lines) / (len(both) or 1),
+        'verdict_agreement': len(same_cls) / (len(both) or 1),
+        'normalization_drift': drift,
+        'missing': only_ref,
+        'extra': only_got,
+        'line_mismatch': [kw for kw in both if kw not in same_lines],
+        'verdict_mismatch': [kw for kw in both if kw not in same_cls],
+    }
+
+# -----------------------------
+# 보고
+# -----------------------------
+def print_report(name: str, result: Dict, prev: Optional[Dict]):
+    print(f"\n===== {name} =====")
+    print(f"rows={result['rows']}, keywords={result['keywords']}, wall={result['wall_s']:.3f}s "
+          f"({result['rows'] / result['wall_s']:.0f} rows/s, {result['keywords'] / result['wall_s']:.0f} keywords/s)")
+    for stage, r in result['stages'].items():
+        print(f"  {stage:<16s}{r['wall_s']:>9.3f}s {r['per_s']:>14,.0f} {r['unit']}/s")
+    acc = result.get('agreement')
+    if acc:
+        print(f"  일치도: jaccard={acc['jaccard']:.3f} recall={acc['recall']:.3f} precision={acc['precision']:.3f} "
+              f"lines={acc['line_agreement']:.3f} verdict={acc['verdict_agreement']:.3f}")
+        for key in ('normalization_drift', 'missing', 'extra', 'line_mismatch', 'verdict_mismatch'):
+            if acc[key]:
+                print(f"    {key}: {', '.join(acc[key][:10])}{' ...' if len(acc[key]) > 10 else ''}")
+    if prev is not None:
+        same = prev.get('fingerprint') == result['fingerprint']
+        print(f"  결과 지문: {result['fingerprint']} ({'직전과 동일' if same else '직전과 다름!'})")
+    else:
+        print(f"  결과 지문: {result['fingerprint']} (첫 기록)")
+
+def last_history(path: str) -> Dict[str, Dict]:
+    last: Dict[str, Dict] = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    last.update(json.loads(line).get('scenarios', {}))
+                except ValueError:
+                    continue
+    return last
+
+def run_scenario(input_file: str, out_dir: str, known: Set[str], ref: Optional[pd.DataFrame]) -> Dict:
+    final_df, metrics, wall = run_pipeline(input_file, out_dir, known)
+    counters = metrics.get('counters', {})
+    result = {
+        'rows': counters.get('rows', 0),
+        'keywords': counters.get('keywords', 0),
+        'wall_s': wall,
+        'stages': stage_rates(metrics),
+        'registry_calls': counters.get('registry_calls', 0),
+        'fingerprint': fingerprint(final_df),
+    }
+    if ref is not None:
+        result['agreement'] = agreement(ref, final_df)
+    return result
+
+def check_error_recheck(case_dir: str) -> Tuple[bool, str]:
+    """
+    장애 중 실행(모든 조회 503) → 복구 후 재개 실행 → 다시 재개 실행.
+    오류 판정은 이월되지 않아 두 번째 실행이 해당 키워드를 모두 다시 조회하고 정상 실행과 같은 결과를 내며,
+    세 번째 실행은 정상 판정을 이월해 조회하지 않아야 한다.
+    """
+    os.makedirs(case_dir, exist_ok=True)
+    input_file = os.path.join(case_dir, 'input.csv')
+    known = synthetic_input(RECHECK_ROWS, input_file)
+    healthy_df, _, _ = run_pipeline(input_file, os.path.join(case_dir, 'healthy'), known)
+    out_dir = os.path.join(case_dir, 'resumed')
+    outage_df, outage, _ = run_pipeline(input_file, out_dir, known, fail_status=OUTAGE_STATUS)
+    recovered_df, recovered, _ = run_pipeline(input_file, out_dir, known, resume=True)
+    _, settled, _ = run_pipeline(input_file, out_dir, known, resume=True)
+    failed_kws = outage['counters'].get('registry_keywords', 0)
+    calls = [m['counters'].get('registry_calls', 0) for m in (outage, recovered, settled)]
+    ok = (failed_kws > 0 and calls[1] == failed_kws and calls[2] == 0
+          and (outage_df['classification'] == 'NPM Package').sum() == 0
+          and fingerprint(recovered_df) == fingerprint(healthy_df))
+    return ok, (f"장애 중 조회 {calls[0]}건(전부 {OUTAGE_STATUS}) → 복구 후 재조회 {calls[1]}/{failed_kws}건, "
+                f"다음 실행 조회 {calls[2]}건, 정상 실행과 결과 {'같음' if fingerprint(recovered_df) == fingerprint(healthy_df) else '다름'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="prompt_detection 종단 간 처리량/정확도 하네스")
+    parser.add_argument("--synthetic-rows", type=int, default=SYNTHETIC_ROWS, help="합성 코퍼스 행 수(0 = 생략)")
+    parser.add_argument("--input", type=str, default=None, help="실제 응답 CSV(system_prompt, response 열)")
+    parser.add_argument("--reference", type=str, default=None, help="--input과 비교할 FINAL 결과 CSV")
+    parser.add_argument("--work-dir", type=str, default=None, help="중간 산출물 위치(기본: 임시 디렉터리)")
+    parser.add_argument("--check", action="store_true", help="결과 지문이 직전 기록과 다르면 종료 코드 1")
+    args = parser.parse_args()
+
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix='e2e_'))
+    prev = last_history(E2E_HISTORY_FILE)
+    scenarios: Dict[str, Dict] = {}
+
+    for fname in REFERENCE_FILES:
+        path = os.path.join(REFERENCE_DIR, fname)
+        if not os.path.exists(path):
+            print(f"기준 결과가 없어 건너뜀: {path}")
+            continue
+        ref = load_reference(path)
+        name = f"ref:{fname}"
+        case_dir = os.path.join(work_dir, os.path.splitext(fname)[0].strip().replace(' ', '_'))
+        os.makedirs(case_dir, exist_ok=True)
+        input_file = os.path.join(case_dir, 'input.csv')
+        shape_rows = reconstruct_input(ref, input_file)
+        print(f"{name} 재구성 모양별 행 수: {', '.join(f'{k}={v}' for k, v in sorted(shape_rows.items()))}")
+        known = {pdet.normalize_npm_name(kw)[0] for kw, ex in zip(ref['keyword'], ref['exists']) if ex}
+        scenarios[name] = run_scenario(input_file, os.path.join(case_dir, 'out'), known, ref)
+        print_report(name, scenarios[name], prev.get(name))
+
+    if args.input:
+        ref = load_reference(args.reference) if args.reference else None
+        known = set() if ref is None else {pdet.normalize_npm_name(kw)[0] for kw, ex in zip(ref['keyword'], ref['exists']) if ex}
+        name = f"input:{os.path.basename(args.input)}"
+        scenarios[name] = run_scenario(os.path.abspath(args.input), os.path.join(work_dir, 'input', 'out'), known, ref)
+        print_report(name, scenarios[name], prev.get(name))
+
+    if args.synthetic_rows > 0:
+        name = f"synthetic:{args.synthetic_rows}"
+        case_dir = os.path.join(work_dir, 'synthetic')
+        os.makedirs(case_dir, exist_ok=True)
+        input_file = os.path.join(case_dir, 'input.csv')
+        known = synthetic_input(args.synthetic_rows, input_file)
+        scenarios[name] = run_scenario(input_file, os.path.join(case_dir, 'out'), known, None)
+        print_report(name, scenarios[name], prev.get(name))
+
+    entry = {
+        'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git': bench_extraction.git_revision(),
+        'extractor_version': pdet.EXTRACTOR_VERSION,
+        'scenarios': scenarios,
+    }
+    with open(E2E_HISTORY_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"\n기록 추가: {E2E_HISTORY_FILE} (작업 디렉터리: {work_dir})")
+
+    recheck_ok, recheck_detail = check_error_recheck(os.path.join(work_dir, 'recheck'))
+    print(f"\n[{'OK' if recheck_ok else 'FAIL'}] 오류 판정 재확인: {recheck_detail}")
+    if not recheck_ok:
+        sys.exit(1)
+
+    changed = [name for name, r in scenarios.items()
+               if name in prev and prev[name].get('fingerprint') != r['fingerprint']]
+    if args.check and changed:
+        print(f"결과가 직전 기록과 달라진 시나리오: {', '.join(changed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
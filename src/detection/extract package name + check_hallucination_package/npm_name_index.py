@@ -0,0 +1,126 @@
+import os, sys, mmap, math, struct, hashlib
+import pandas as pd
+from typing import Iterable, List
+
+# -----------------------------
+# npm 패키지명 스냅샷 색인(오프라인 존재 확인용)
+#   npm_package_names.csv(헤더 없음, 1열 = 패키지명)를 한 번 변환해 두고
+#   mmap으로 열어 조회한다. 파일 구성(리틀엔디언):
+#     [헤더 32B] magic(8) | count(u32) | bloom_k(u32) | bloom_bytes(u32) | pad(4) | blob_len(u64)
+#     [Bloom 필터 bloom_bytes]
+#     [오프셋 (count+1) x u64]  - blob 안에서 i번째 이름의 시작 위치
+#     [blob]                    - UTF-8 바이트 기준 정렬된 이름을 이어붙인 것
+#   조회: Bloom 필터로 대부분의 '없음'을 즉시 거르고, 통과하면 정렬 테이블 이진 탐색.
+# -----------------------------
+MAGIC = b'NPMIDX01'
+HEADER = struct.Struct('<8sIII4xQ')
+OFFSET = struct.Struct('<Q')
+BITS_PER_NAME = 10  # 오탐률 약 1%
+
+def _bloom_positions(key: bytes, k: int, m_bits: int) -> Iterable[int]:
+    d = hashlib.blake2b(key, digest_size=16).digest()
+    h1 = int.from_bytes(d[:8], 'little')
+    h2 = int.from_bytes(d[8:], 'little') | 1
+    return ((h1 + i * h2) % m_bits for i in range(k))
+
+def load_snapshot_names(csv_path: str) -> List[str]:
+    """reference_code와 같은 방식(header=None, 0번 열)으로 스냅샷 이름 로드"""
+    names = pd.read_csv(csv_path, header=None, usecols=[0], dtype=str, keep_default_na=False)[0]
+    return [n.strip() for n in names if n and n.strip()]
+
+def build_index(names: Iterable[str], index_path: str, bits_per_name: int = BITS_PER_NAME) -> int:
+    """이름 목록으로 색인 파일 생성, 기록한 이름 수 반환"""
+    keys = sorted({n.encode('utf-8') for n in names})
+    count = len(keys)
+    m_bits = max(64, count * bits_per_name)
+    bloom_bytes = (m_bits + 63) // 64 * 8   # 8바이트 정렬
+    m_bits = bloom_bytes * 8
+    k = max(1, round(bits_per_name * math.log(2)))
+
+    bloom = bytearray(bloom_bytes)
+    for key in keys:
+        for pos in _bloom_positions(key, k, m_bits):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+
+    offsets = bytearray(OFFSET.size * (count + 1))
+    cur = 0
+    for i, key in enumerate(keys):
+        OFFSET.pack_into(offsets, i * OFFSET.size, cur)
+        cur += len(key)
+    OFFSET.pack_into(offsets, count * OFFSET.size, cur)
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count, k, bloom_bytes, cur))
+        f.write(bloom)
+        f.write(offsets)
+        for key in keys:
+            f.write(key)
+    os.replace(tmp_path, index_path)
+    return count
+
+class NpmNameIndex:
+    """build_index로 만든 파일을 mmap으로 열어 'name in index' 조회 제공(프로세스 간 페이지 공유)"""
+
+    def __init__(self, index_path: str):
+        self._f = open(index_path, 'rb')
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._k, bloom_bytes, blob_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"npm 이름 색인 형식이 아닙니다: {index_path}")
+        self._bloom_start = HEADER.size
+        self._m_bits = bloom_bytes * 8
+        self._off_start = self._bloom_start + bloom_bytes
+        self._blob_start = self._off_start + OFFSET.size * (self.count + 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, i: int) -> int:
+        return OFFSET.unpack_from(self._mm, self._off_start + i * OFFSET.size)[0]
+
+    def name_at(self, i: int) -> str:
+        a, b = self._offset(i), self._offset(i + 1)
+        return self._mm[self._blob_start + a:self._blob_start + b].decode('utf-8')
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.name_at(i)
+
+    def might_contain(self, key: bytes) -> bool:
+        mm, start = self._mm, self._bloom_start
+        for pos in _bloom_positions(key, self._k, self._m_bits):
+            if not mm[start + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        key = name.encode('utf-8')
+        if not self.might_contain(key):
+            return False
+        mm, blob = self._mm, self._blob_start
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            a, b = self._offset(mid), self._offset(mid + 1)
+            cur = mm[blob + a:blob + b]
+            if cur == key:
+                return True
+            if cur < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+if __name__ == "__main__":
+    # 사용법: python npm_name_index.py <npm_package_names.csv> <출력 색인 파일>
+    if len(sys.argv) != 3:
+        print("사용법: python npm_name_index.py <npm_package_names.csv> <npm_names.idx>")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    n = build_index(load_snapshot_names(src), dst)
+    print(f"색인 생성 완료: {dst} ({n} names, {os.path.getsize(dst)} bytes)")
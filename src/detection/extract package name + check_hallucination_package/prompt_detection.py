@@ -1,7 +1,25 @@
-import os, re, sys, time, json, requests, pandas as pd
+import os, re, sys, time, json, hashlib, threading, requests, pandas as pd
+from array import array
 from ast import literal_eval
+from bisect import bisect_left
+from functools import lru_cache
 from collections import defaultdict, Counter
-from typing import Optional, List, Set, Dict, Callable, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Optional, List, Set, Dict, Callable, Tuple, Iterator, Iterable
+from registry_cache import VerdictCache, STATUS_EXISTS, STATUS_MISSING, STATUS_ERROR
+from npm_name_index import NpmNameIndex
+from result_journal import ResultJournal
+from typo_index import TypoIndex
+from run_metrics import RunMetrics
+from row_bitmap import RowBitmap, RowSetIndex
+from response_store import ResponseStore, ensure_store, open_store, FIRST_LINE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pq = None  # Parquet 출력 불가 → CSV로 대체
 
 # -----------------------------
 # 기본 설정(무인자 실행)
@@ -10,10 +28,37 @@ INPUT_FILE  = "D:\slopsquating\sc_projectspaper_prompts_expanded_v2_out.csv"
 OUTPUT_FILE = "D:\slopsquating\FINAL_verified_npm_by_system.csv"
 SYSTEM_COL  = "system_prompt"
 RESPONSE_COL= "response_prompt"
-SAVE_INTERVAL = 50
+RESPONSE_STORE = True   # 입력 CSV를 <입력>.rstore(mmap 행 저장소)로 한 번 변환해 행 단위로 읽음(False = DataFrame 전체 로드)
+SAVE_INTERVAL = 50      # 저널 fsync 간격(키워드 수)
+OUTPUT_FORMAT = "parquet"  # 'parquet'(list<int32> 라인 열, 사전 인코딩) | 'csv' | 'both'
+METRICS_FILE = "detection_metrics.json"  # 단계별 시간/카운터 JSON(None = 요약표만 출력)
 TIMEOUT = 5
-RATE_SLEEP = 0.0
 RESUME = True
+# 다중 모델 배치: 모델명 -> (응답 CSV, FINAL 출력 CSV). 비어 있으면 INPUT_FILE/OUTPUT_FILE 단일 실행
+BATCH_MODELS: Dict[str, Tuple[str, str]] = {
+    # "marin": (r"D:\slopsquating\sc_paper_prompts_expanded_v2_out_marin.csv", r"D:\slopsquating\FINAL_verified_npm_by_system_marin.csv"),
+    # "qwen":  (r"D:\slopsquating\sc_paper_prompts_expanded_v2_out_qwen.csv",  r"D:\slopsquating\FINAL_verified_npm_by_system_qwen.csv"),
+}
+BATCH_COMBINED_FILE = "FINAL_verified_npm_by_model.csv"
+ROW_SETS = True         # 키워드/모델/프롬프트별 행 비트맵 색인(<출력>.rowsets) 저장(row_bitmap.RowSetIndex로 조회)
+INCREMENTAL = True      # 행 해시가 같은 행은 재추출 생략, 라인 집합이 같은 키워드는 판정 이월
+EXTRACTOR_VERSION = 2   # 추출/정규화 규칙이 바뀌면 올릴 것(저장된 행 상태 무효화)
+NORMALIZE_CACHE_SIZE = 1 << 18  # normalize_npm_name 결과 캐시 크기(서로 다른 원시 토큰 수)
+EXTRACT_WORKERS = 1     # build_expected 프로세스 수(1 이하 = 단일 프로세스)
+SHARD_SIZE = 2000       # 병렬 추출 시 샤드당 행 수
+NPM_REGISTRY = "https://registry.npmjs.org"  # 로컬 스텁 레지스트리로 바꿔 테스트 가능
+REGISTRY_PROBE = "head"      # 'head' | 'abbrev'(축약 메타데이터, 본문은 ABBREV_MAX_BODY까지만 읽음) | 'full'(전체 packument)
+ABBREV_MAX_BODY = 1 << 20    # abbrev 본문을 끝까지 읽을 최대 크기(이하면 커넥션 재사용, 초과하면 끊고 새로 연결)
+REGISTRY_MAX_INFLIGHT = 16   # 동시에 진행되는 레지스트리 요청 수(= 커넥션 풀 크기)
+REGISTRY_RATE_LIMIT = 0.0    # 초당 최대 요청 수(0 = 제한 없음)
+REGISTRY_CACHE_FILE = "npm_verdict_cache.sqlite"  # 모델/실행 간 공유 판정 캐시(None = 미사용)
+CACHE_POSITIVE_TTL = 30 * 24 * 3600  # 존재(200) 판정 유효 시간(초)
+CACHE_NEGATIVE_TTL = 3 * 24 * 3600   # 404 판정 유효 시간(초)
+REUSABLE_STATUSES = frozenset({STATUS_EXISTS, STATUS_MISSING})  # 다음 실행에 이월하는 레지스트리 판정(오류는 항상 재확인)
+NPM_NAME_INDEX = None   # npm_name_index.py로 만든 스냅샷 색인 경로(None = 미사용)
+OFFLINE_ONLY = False    # True면 스냅샷에 없는 이름도 레지스트리 조회 없이 미존재 처리(망 분리 노드용)
+SUGGEST_INDEX = None    # typo_index.py로 만든 유사 패키지 색인 디렉터리(None = suggested_package 열 미생성)
+SUGGEST_TOP_K = 3       # Unknown/Invalid 키워드당 제안할 근접 패키지 수
 
 # -----------------------------
 # 필터 목록
@@ -28,6 +73,37 @@ JS_KEYWORDS: Set[str] = {
     'String','Number','Boolean','Map','Set','Symbol','Intl','WeakMap','WeakSet'
 }
 
+# -----------------------------
+# 사전 컴파일 패턴(행마다 재컴파일/캐시 조회 방지)
+# -----------------------------
+CODEBLOCK_RE      = re.compile(r'```.*?```', re.S)
+INVALID_NPM_RE    = re.compile(r'[^a-zA-Z0-9@._/\-]')
+BRACKET_RE        = re.compile(r'[();\[\]{}<>]')
+NULL_TOKENS       = frozenset({'none','null','n/a','na','nil'})
+JSON_ARRAY_RE     = re.compile(r'(\[.*?\])', re.S)
+NPM_INSTALL_RE    = re.compile(r'\bnpm\s+(?:i|install)\b')
+WHITESPACE_RE     = re.compile(r'\s+')
+BULLET_RE         = re.compile(r"^\s*(?:[-*•]|[\d]{1,3}[\).])\s*([@\w./-]+)")
+
+# import/require 스캐너용 토큰(모든 반복에 상한 또는 '항상 성공'하는 꼬리 → 입력 길이에 선형)
+#   각 분기를 리터럴 한 글자로 시작해 re가 첫 글자 집합으로 후보 위치를 빠르게 건너뛰게 한다.
+#   단어 경계는 첫 글자 뒤의 lookbehind로 검사(r(?<![\w$.]r)equire = 앞 글자가 식별자/점이 아닌 require)
+_IMPORT_SPEC = r"""[^'"`\n)]{1,256}"""
+_IMPORT_STMTS = (
+    rf"""r(?<![\w$.]r)equire\s*\(\s*(?P<rq>['"`])(?P<rs>{_IMPORT_SPEC})(?P=rq)\s*\)"""
+    rf"""|i(?<![\w$.]i)mport(?:\s*\(\s*(?P<dq>['"`])(?P<ds>{_IMPORT_SPEC})(?P=dq)"""   # import('x')
+    rf"""|\s*(?P<bq>['"])(?P<bs>{_IMPORT_SPEC})(?P=bq)"""                               # import 'x'
+    r"""|\s+(?P<ns>[@\w./-]{1,256})\s+(?=from\b))"""                                   # import x from('from'은 남김)
+    rf"""|f(?<![\w$.]f)rom\s*(?P<fq>['"])(?P<fs>{_IMPORT_SPEC})(?P=fq)"""               # import/export ... from 'x'
+)
+_CODE_NOISE = (
+    r"""//[^\n]*|/\*(?:[^*`]+|\*(?!/)|`(?!``))*(?:\*/)?"""                             # 닫히지 않은 주석은 펜스/끝에서 멈춤
+    r"""|'(?:[^'\\\n]+|\\.)*'?|"(?:[^"\\\n]+|\\.)*"?|`(?:[^`\\]+|\\[\s\S])*`?"""
+)
+IMPORT_PROSE_RE = re.compile(rf"```|{_IMPORT_STMTS}")
+IMPORT_CODE_RE  = re.compile(rf"```|{_CODE_NOISE}|{_IMPORT_STMTS}")
+IMPORT_SPEC_GROUPS = frozenset({'rs', 'ds', 'bs', 'ns', 'fs'})
+
 # -----------------------------
 # 유틸 함수 (정규화/검증/저장)
 # -----------------------------
@@ -37,11 +113,30 @@ def normalize_token_common(token: str) -> Optional[str]:
     t = token.strip().strip('`\'"')
     if not t or len(t) > 214: return None
     if t.isdigit() or ' ' in t: return None
-    if any(ch in t for ch in '();[]{}<>'): return None
-    if t.startswith('$') or t.lower() in {'none','null','n/a','na','nil'}: return None
+    if BRACKET_RE.search(t): return None
+    if t.startswith('$') or t.lower() in NULL_TOKENS: return None
     return t
 
 def normalize_npm_name(name: str) -> Tuple[Optional[str], bool]:
+    """같은 원시 토큰이 행/전략마다 반복되므로 문자열 입력은 캐시를 거친다"""
+    if isinstance(name, str):
+        return _normalize_cached(name)
+    return _normalize_npm_name(name)
+
+def normalize_many(tokens: List[str]) -> List[Tuple[Optional[str], bool]]:
+    """후보 배열을 한 번에 정규화(중복 토큰은 한 번만 계산, 입력 순서 유지)"""
+    uniq = dict.fromkeys(tokens)
+    for t in uniq:
+        uniq[t] = normalize_npm_name(t)
+    return [uniq[t] for t in tokens]
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(name: str) -> Tuple[Optional[str], bool]:
+    norm, bad_scope = _normalize_npm_name(name)
+    # 정규화 결과는 색인/집합에 반복 저장되므로 intern으로 한 객체만 공유
+    return (sys.intern(norm) if norm else norm, bad_scope)
+
+def _normalize_npm_name(name: str) -> Tuple[Optional[str], bool]:
     """
     npm 패키지명 정제(완화 버전):
       - 허용 문자만 유지: [a-zA-Z0-9@._/\-]
@@ -53,7 +148,7 @@ def normalize_npm_name(name: str) -> Tuple[Optional[str], bool]:
     t = normalize_token_common(name)
     if t is None: return (None, False)
 
-    if re.search(r'[^a-zA-Z0-9@._/\-]', t):
+    if INVALID_NPM_RE.search(t):
         return (None, False)
 
     bad_scope = False
@@ -71,7 +166,7 @@ def normalize_npm_name(name: str) -> Tuple[Optional[str], bool]:
     return (t.lower(), bad_scope)
 
 def strip_codeblocks(text: str) -> str:
-    return re.sub(r'```.*?```', '', text, flags=re.S)
+    return CODEBLOCK_RE.sub('', text)
 
 def parse_line_list(x) -> List[int]:
     if x is None or (isinstance(x, float) and pd.isna(x)): return []
@@ -87,50 +182,106 @@ def parse_line_list(x) -> List[int]:
     # fallback: digits
     return [int(v) for v in re.findall(r'\d+', s)]
 
-def save_csv(df: pd.DataFrame, path: str):
-    # list/set → JSON스러운 문자열로 저장
-    out = df.copy()
-    out['line_numbers'] = out['line_numbers'].apply(lambda xs: list(xs) if isinstance(xs, (list,set,tuple)) else xs)
-    out.to_csv(path, index=False, encoding="utf-8-sig")
+def parquet_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".parquet"
+
+def save_parquet(df: pd.DataFrame, path: str, list_cols=(), dict_cols=(), str_list_cols=()):
+    """
+    list_cols: 정수 리스트 열 → list<int32> (문자열화/literal_eval 불필요)
+    dict_cols: 반복 값이 많은 문자열 열 → dictionary<string> 인코딩
+    str_list_cols: 문자열 리스트 열 → list<string>
+    """
+    arrays, names = [], []
+    for col in df.columns:
+        if col in list_cols:
+            arr = pa.array([list(xs) for xs in df[col]], type=pa.list_(pa.int32()))
+        elif col in str_list_cols:
+            arr = pa.array([list(xs) for xs in df[col]], type=pa.list_(pa.string()))
+        elif col in dict_cols:
+            arr = pa.array(df[col].astype(str).tolist(), type=pa.string()).dictionary_encode()
+        else:
+            arr = pa.array(df[col])
+            if pa.types.is_null(arr.type) and df[col].dtype == object:
+                arr = arr.cast(pa.string())  # 전부 None인 문자열 열
+        arrays.append(arr)
+        names.append(str(col))
+    pq.write_table(pa.Table.from_arrays(arrays, names=names), path)
+
+def save_table(df: pd.DataFrame, path: str, list_cols=(), dict_cols=(), str_list_cols=()) -> List[str]:
+    """OUTPUT_FORMAT에 따라 Parquet/CSV로 저장하고 기록한 파일 경로 목록 반환(path는 CSV 기준 경로)"""
+    written = []
+    fmt = OUTPUT_FORMAT
+    if fmt in ('parquet', 'both'):
+        if pq is None:
+            print("pyarrow가 없어 Parquet 대신 CSV로 저장합니다.")
+            fmt = 'csv'
+        else:
+            save_parquet(df, parquet_path(path), list_cols, dict_cols, str_list_cols)
+            written.append(parquet_path(path))
+    if fmt in ('csv', 'both'):
+        # list/set → JSON스러운 문자열로 저장
+        out = df.copy()
+        for col in (c for c in (*list_cols, *str_list_cols) if c in out.columns):
+            out[col] = out[col].apply(lambda xs: list(xs) if isinstance(xs, (list,set,tuple)) else xs)
+        out.to_csv(path, index=False, encoding="utf-8-sig")
+        written.append(path)
+    metrics.count('bytes_written', sum(os.path.getsize(p) for p in written))
+    return written
 
 # -----------------------------
 # 추출 전략
+#   _xxx_core: 코드블록이 이미 제거된 텍스트를 받는 본체(_import_core만 원문을 받음: RAW_TEXT_CORES)
+#   strat_xxx: 원문을 받는 공개 래퍼(기존 시그니처 유지)
 # -----------------------------
-def strat_comma(text: str) -> List[str]:
-    text = strip_codeblocks(text).replace('\n', ',')
+def _comma_core(text: str) -> List[str]:
+    text = text.replace('\n', ',')
     return [t.strip() for t in text.split(',') if t.strip()]
 
-def strat_newline(text: str) -> List[str]:
-    text = strip_codeblocks(text)
+def _newline_core(text: str) -> List[str]:
     return [t.strip() for t in text.splitlines() if t.strip()]
 
-def strat_json(text: str) -> List[str]:
-    text = strip_codeblocks(text)
-    m = re.search(r'\[.*?\]', text, flags=re.S)
+def _json_core(text: str) -> List[str]:
+    m = JSON_ARRAY_RE.search(text)
     if not m: return []
+    return _json_array_items(m.group(0))
+
+def _json_array_items(array_text: str) -> List[str]:
     try:
-        arr = json.loads(m.group(0))
+        arr = json.loads(array_text)
         if isinstance(arr, list):
             return [str(x) for x in arr]
     except Exception:
         return []
     return []
 
-def strat_import(text: str) -> List[str]:
-    text = strip_codeblocks(text)
+def _import_core(text: str) -> List[str]:
+    """
+    응답 원문을 앞에서부터 한 번 훑어 모듈 지정자를 문서 순서로 추출.
+      - ``` 펜스 상태를 추적해 코드블록 안/밖을 모두 스캔(닫히지 않은 펜스는 끝까지 코드로 취급)
+      - 코드블록 안에서는 주석과 문자열 리터럴을 통째로 건너뜀(문자열 속 'import ...'는 무시)
+      - require('x'), import('x'), import ... from 'x', export ... from 'x', import 'x',
+        import x from(따옴표 없는 기본 import 이름, 기존 동작 유지)
+    두 정규식을 상태에 따라 번갈아 쓰며 매치가 끝난 위치에서 이어가므로 각 문자는 한 번만 소비된다.
+    """
     cands = []
-    for m in re.finditer(r"require\(\s*['\"]([^'\"\)]+)['\"]\s*\)", text): cands.append(m.group(1))
-    for m in re.finditer(r"from\s+['\"]([^'\"\)]+)['\"]", text): cands.append(m.group(1))
-    for m in re.finditer(r"\bimport\s+['\"]([^'\"\)]+)['\"]", text): cands.append(m.group(1))
-    for m in re.finditer(r"\bimport\s+([@\w./-]+)\s+from\b", text): cands.append(m.group(1))
+    pos, in_code, n = 0, False, len(text)
+    while pos < n:
+        m = (IMPORT_CODE_RE if in_code else IMPORT_PROSE_RE).search(text, pos)
+        if m is None:
+            break
+        spec = m.lastgroup  # 지정자 그룹이 가장 늦게 닫힘, 펜스/주석/문자열이면 None
+        if spec in IMPORT_SPEC_GROUPS:
+            cands.append(m.group(spec))
+        elif spec is None and m.group() == '```':
+            in_code = not in_code
+        pos = m.end()
     return cands
 
-def strat_npm_install(text: str) -> List[str]:
-    text = strip_codeblocks(text)
+def _npm_install_core(text: str) -> List[str]:
     cands = []
     for line in text.splitlines():
-        if re.search(r'\bnpm\s+(?:i|install)\b', line):
-            parts = re.split(r'\s+', line.strip())
+        if NPM_INSTALL_RE.search(line):
+            parts = WHITESPACE_RE.split(line.strip())
             try:
                 idx = next(i for i, p in enumerate(parts) if p in {'i','install'})
             except StopIteration:
@@ -140,17 +291,33 @@ def strat_npm_install(text: str) -> List[str]:
                     cands.append(tok)
     return cands
 
-def strat_bullet(text: str) -> List[str]:
-    text = strip_codeblocks(text)
+def _bullet_core(text: str) -> List[str]:
     cands = []
     for line in text.splitlines():
-        m = re.match(r"^\s*(?:[-*•]|[\d]{1,3}[\).])\s*([@\w./-]+)", line.strip())
+        m = BULLET_RE.match(line.strip())
         if m: cands.append(m.group(1))
     return cands
 
+def strat_comma(text: str) -> List[str]:
+    return _comma_core(strip_codeblocks(text))
+
+def strat_newline(text: str) -> List[str]:
+    return _newline_core(strip_codeblocks(text))
+
+def strat_json(text: str) -> List[str]:
+    return _json_core(strip_codeblocks(text))
+
+def strat_import(text: str) -> List[str]:
+    return _import_core(text)
+
+def strat_npm_install(text: str) -> List[str]:
+    return _npm_install_core(strip_codeblocks(text))
+
+def strat_bullet(text: str) -> List[str]:
+    return _bullet_core(strip_codeblocks(text))
+
 def strat_fallback(text: str) -> List[str]:
-    text = strip_codeblocks(text).replace('\n', ',')
-    return [t.strip() for t in text.split(',') if t.strip()]
+    return _comma_core(strip_codeblocks(text))
 
 # -----------------------------
 # system_prompt → 전략 선택(보강)
@@ -189,6 +356,7 @@ STRATEGY_KEYS = [
     ('list', strat_bullet),
 ]
 
+@lru_cache(maxsize=None)  # system_prompt 종류는 몇 개뿐 → 프롬프트당 1회만 스캔
 def choose_strategy(system_prompt: str) -> Tuple[Callable[[str], List[str]], str]:
     sp = (system_prompt or "").lower()
     for key, strat in STRATEGY_KEYS:
@@ -196,246 +364,1016 @@ def choose_strategy(system_prompt: str) -> Tuple[Callable[[str], List[str]], str
             return strat, strat.__name__
     return strat_comma, 'strat_comma'
 
+# -----------------------------
+# 단일 패스 추출 엔진(행 단위 파싱 캐시)
+# -----------------------------
+# 전략 이름 → 코드블록 제거 후 텍스트에 적용할 본체
+STRATEGY_CORES: Dict[str, Callable[[str], List[str]]] = {
+    'strat_comma': _comma_core,
+    'strat_newline': _newline_core,
+    'strat_json': _json_core,
+    'strat_import': _import_core,
+    'strat_npm_install': _npm_install_core,
+    'strat_bullet': _bullet_core,
+    'strat_fallback': _comma_core,
+}
+# 코드블록을 지우지 않은 원문을 받는 본체(코드 안의 require/import가 주 대상)
+RAW_TEXT_CORES = frozenset({'strat_import'})
+# 전략 이름 → 비트(역색인에서 '어떤 전략으로 재현되는가'를 정수 하나로 표현)
+STRATEGY_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(STRATEGY_CORES)}
+
+class RowParse:
+    """
+    응답 1행을 한 번 스캔해 얻은 결과.
+      - strategy   : 이 행에 실제 적용된 전략(후보가 없으면 'strat_fallback')
+      - names      : strategy 기준 정규화 키워드 -> BAD_SCOPE 여부
+      - by_strategy: 전략 이름 -> 정규화 키워드 집합(빈 결과면 fallback 적용)
+    """
+    __slots__ = ('strategy', 'names', 'by_strategy')
+
+    def __init__(self, strategy: str, names: Dict[str, bool], by_strategy: Dict[str, frozenset]):
+        self.strategy = strategy
+        self.names = names
+        self.by_strategy = by_strategy
+
+def normalize_all(cands: List[str]) -> Dict[str, bool]:
+    """후보 목록 정규화: normalized -> BAD_SCOPE 여부(OR)"""
+    out: Dict[str, bool] = {}
+    for norm, bad_scope in normalize_many(cands):
+        if not norm: continue
+        out[norm] = out.get(norm, False) or bad_scope
+    return out
+
+def _make_row_parse(strat_name: str, raw: Dict[str, List[str]]) -> RowParse:
+    """전략별 원시 후보(raw)로 RowParse 구성. '빈 결과 → strat_fallback' 규칙도 여기서 적용"""
+    normed: Dict[str, Dict[str, bool]] = {}
+    for name in STRATEGY_CORES:
+        if name == 'strat_fallback':
+            normed[name] = normed['strat_comma']   # comma/fallback은 동일 결과 재사용
+        else:
+            normed[name] = normalize_all(raw[name])
+
+    by_strategy: Dict[str, frozenset] = {}
+    for name in STRATEGY_CORES:
+        effective = name if raw[name] else 'strat_fallback'
+        by_strategy[name] = frozenset(normed[effective])
+
+    if not raw[strat_name]:
+        strat_name = 'strat_fallback'
+    return RowParse(strat_name, normed[strat_name], by_strategy)
+
+def parse_row(system_prompt: str, response: str) -> RowParse:
+    """
+    strip_codeblocks를 한 번만 수행하고 모든 전략 결과와 정규화 결과를 함께 만든다.
+    """
+    text = strip_codeblocks(response)
+    raw = {name: core(response if name in RAW_TEXT_CORES else text)
+           for name, core in STRATEGY_CORES.items() if name != 'strat_fallback'}
+    raw['strat_fallback'] = raw['strat_comma']
+    _, strat_name = choose_strategy(system_prompt)
+    return _make_row_parse(strat_name, raw)
+
+def parse_rows(system_prompts: List[str], responses: List[str]) -> List[RowParse]:
+    """
+    parse_row의 배치 버전(결과 동일).
+      - 코드블록 제거와 npm install·JSON 패턴은 응답 열 전체에 한 번에 적용(import는 원문 단일 스캔)
+      - 행을 system_prompt별로 묶어 전략은 그룹당 한 번만 결정
+    """
+    # object dtype 유지 → 파이썬 re 의미 그대로(문자열 확장 dtype의 정규식 차이 방지)
+    texts = pd.Series(responses, dtype=object).str.replace(CODEBLOCK_RE, '', regex=True)
+
+    cols: Dict[str, List[List[str]]] = {}
+    cols['strat_comma'] = [_comma_core(t) for t in texts]
+    cols['strat_newline'] = [_newline_core(t) for t in texts]
+    json_arrays = texts.str.extract(JSON_ARRAY_RE, expand=False) if len(texts) else texts
+    cols['strat_json'] = [_json_array_items(m) if isinstance(m, str) else [] for m in json_arrays]
+    cols['strat_import'] = [_import_core(r) for r in responses]
+    has_npm = texts.str.contains(NPM_INSTALL_RE, regex=True) if len(texts) else texts
+    cols['strat_npm_install'] = [_npm_install_core(t) if hit else [] for t, hit in zip(texts, has_npm)]
+    cols['strat_bullet'] = [_bullet_core(t) for t in texts]
+    cols['strat_fallback'] = cols['strat_comma']
+
+    groups: Dict[str, List[int]] = defaultdict(list)
+    for i, sp in enumerate(system_prompts):
+        groups[sp].append(i)
+
+    out: List[Optional[RowParse]] = [None] * len(responses)
+    for sp, idxs in groups.items():
+        _, strat_name = choose_strategy(sp)
+        for i in idxs:
+            out[i] = _make_row_parse(strat_name, {name: col[i] for name, col in cols.items()})
+    return out
+
 # -----------------------------
 # npm Registry 조회
 # -----------------------------
-def exists_on_npm(pkg: str) -> bool:
+class RateLimiter:
+    """스레드 간 공유되는 최소 간격 리미터(rate <= 0 이면 대기 없음)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval: return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_limiter: Optional[RateLimiter] = None
+_cache: Optional[VerdictCache] = None
+_name_index: Optional[NpmNameIndex] = None
+ABBREV_ACCEPT = "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8"
+
+class RegistryStats:
+    """레지스트리 실조회 횟수/전송 바이트 누적(스레드 안전)"""
+
+    def __init__(self):
+        self.checks = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int):
+        with self._lock:
+            self.checks += 1
+            self.bytes += nbytes
+
+registry_stats = RegistryStats()
+metrics = RunMetrics()
+
+def _response_bytes(r: requests.Response) -> int:
+    """상태줄+헤더 추정치 + 실제로 읽은 본문(압축 해제 전) 바이트"""
+    head = len(f"HTTP/1.1 {r.status_code} {r.reason}\r\n\r\n")
+    head += sum(len(k) + len(v) + 4 for k, v in r.headers.items())
+    body = r.raw.tell() if r.raw is not None else 0
+    return head + body
+
+def _drain(r: requests.Response, limit: int):
+    """
+    스트리밍 응답 본문을 limit 바이트까지 읽고 닫는다.
+    끝까지 읽은 커넥션만 풀로 돌아가므로(읽지 않고 닫으면 urllib3가 끊음) 작은 본문은 다 읽는다.
+    """
+    while r.raw.tell() <= limit:
+        if not r.raw.read(64 * 1024, decode_content=False):
+            break
+    r.close()
+
+def get_session() -> requests.Session:
+    """keep-alive 커넥션 풀을 공유하는 레지스트리 세션(최초 호출 시 생성)"""
+    global _session, _limiter, _cache, _name_index
+    with _session_lock:
+        if _session is None:
+            if NPM_NAME_INDEX:
+                _name_index = NpmNameIndex(NPM_NAME_INDEX)
+            if REGISTRY_CACHE_FILE:
+                _cache = VerdictCache(REGISTRY_CACHE_FILE, CACHE_POSITIVE_TTL, CACHE_NEGATIVE_TTL)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, REGISTRY_MAX_INFLIGHT))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _limiter = RateLimiter(REGISTRY_RATE_LIMIT)
+            _session = session
+    return _session
+
+def check_on_npm(pkg: str) -> Tuple[str, Optional[int], int]:
+    """
+    레지스트리 실조회: (status, http_status, 전송 바이트)
+      200=exists, 404=missing, 그 외/예외=error
+    REGISTRY_PROBE에 따라 HEAD / 축약 메타데이터(본문은 ABBREV_MAX_BODY까지만 읽고 닫음) / 전체 GET을 사용한다.
+    """
+    session = get_session()
+    _limiter.wait()
+    url = f"{NPM_REGISTRY}/{pkg}"
     try:
-        r = requests.get(f"https://registry.npmjs.org/{pkg}", timeout=TIMEOUT)
-        return r.status_code == 200
+        if REGISTRY_PROBE == "head":
+            r = session.head(url, timeout=TIMEOUT, allow_redirects=True)
+        elif REGISTRY_PROBE == "abbrev":
+            r = session.get(url, timeout=TIMEOUT, stream=True, headers={"Accept": ABBREV_ACCEPT})
+            _drain(r, ABBREV_MAX_BODY)  # 상태 코드만 필요하지만 keep-alive 유지를 위해 본문을 비움
+        else:
+            r = session.get(url, timeout=TIMEOUT)
     except requests.RequestException:
+        registry_stats.add(0)
+        return STATUS_ERROR, None, 0
+    nbytes = _response_bytes(r)
+    registry_stats.add(nbytes)
+    if r.status_code == 200:
+        return STATUS_EXISTS, 200, nbytes
+    if r.status_code == 404:
+        return STATUS_MISSING, 404, nbytes
+    return STATUS_ERROR, r.status_code, nbytes
+
+def lookup_offline(pkg: str) -> Optional[bool]:
+    """스냅샷 색인으로 확정되면 True/False, 레지스트리 확인이 필요하면 None"""
+    get_session()
+    if _name_index is not None and pkg in _name_index:
+        return True
+    if OFFLINE_ONLY:
         return False
+    return None
+
+def status_on_npm(pkg: str) -> str:
+    """스냅샷 색인 → 판정 캐시 → 레지스트리 순으로 확인: 'exists' | 'missing' | 'error'"""
+    offline = lookup_offline(pkg)
+    if offline is not None:
+        return STATUS_EXISTS if offline else STATUS_MISSING
+    status = _cache.get(pkg) if _cache is not None else None
+    if status is None:
+        status, http_status, _ = check_on_npm(pkg)
+        if _cache is not None:
+            _cache.put(pkg, status, http_status)
+    return status
+
+def exists_on_npm(pkg: str) -> bool:
+    return status_on_npm(pkg) == STATUS_EXISTS
+
+def verify_on_npm(names: List[str]) -> Iterator[str]:
+    """
+    names를 REGISTRY_MAX_INFLIGHT개 스레드로 동시에 조회하고,
+    판정 상태('exists' | 'missing' | 'error')를 입력(키워드) 순서대로 하나씩 돌려준다.
+    스냅샷 색인으로 확정되는 이름은 스레드 풀에 보내지 않는다.
+    """
+    if not names: return
+    offline = [lookup_offline(n) for n in names]
+    online = [n for n, ok in zip(names, offline) if ok is None]
+    metrics.count('offline_index_hits', len(names) - len(online))
+    with ThreadPoolExecutor(max_workers=max(1, REGISTRY_MAX_INFLIGHT)) as ex:
+        online_statuses = ex.map(status_on_npm, online)
+        for ok in offline:
+            if ok is None:
+                yield next(online_statuses)
+            else:
+                yield STATUS_EXISTS if ok else STATUS_MISSING
+
+# -----------------------------
+# Unknown/Invalid 키워드의 근접 실존 패키지 제안(오프라인)
+# -----------------------------
+_suggest_index: Optional[TypoIndex] = None
+
+def add_suggestions(final_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    SUGGEST_INDEX가 있으면 Unknown/Invalid 행에 근접 패키지 열 추가
+      suggested_package(1순위) / all_suggested_packages(top-k) / suggestion_distance
+    열 이름은 check_by_socket_dev.py의 typosquatting 결과와 맞춘다.
+    """
+    global _suggest_index
+    if not SUGGEST_INDEX:
+        return final_df
+    if _suggest_index is None:
+        _suggest_index = TypoIndex(SUGGEST_INDEX)
+    top, all_top, dist = [], [], []
+    for kw, classification in zip(final_df['keyword'], final_df['classification']):
+        found = _suggest_index.suggest(kw, k=SUGGEST_TOP_K) if classification == 'Unknown/Invalid' else []
+        top.append(found[0][0] if found else None)
+        all_top.append([name for name, _ in found])
+        dist.append(found[0][1] if found else None)
+    final_df['suggested_package'] = top
+    final_df['all_suggested_packages'] = all_top
+    final_df['suggestion_distance'] = pd.array(dist, dtype='Int64')
+    n = sum(t is not None for t in top)
+    print(f"근접 패키지 제안: {n}/{(final_df['classification'] == 'Unknown/Invalid').sum()} Unknown/Invalid keywords")
+    return final_df
 
 # -----------------------------
 # SC → 기대 키워드 매핑(재현용)
 # -----------------------------
-def build_expected(sc_df: pd.DataFrame) -> Tuple[Dict[str, Set[int]], Dict[str, str], Dict[str, bool]]:
+class Posting:
+    """키워드 1개의 역색인 항목: 정렬된 라인(array('I')) + 라인별 전략 비트마스크(array('B'))"""
+    __slots__ = ('lines', 'masks')
+
+    def __init__(self):
+        self.lines = array('I')
+        self.masks = array('B')
+
+    def add(self, ln: int, mask: int):
+        lines = self.lines
+        if lines and lines[-1] == ln:
+            self.masks[-1] |= mask
+        elif not lines or ln > lines[-1]:  # 행 순서대로 쌓이므로 대부분 끝에 추가
+            lines.append(ln)
+            self.masks.append(mask)
+        else:
+            i = bisect_left(lines, ln)
+            if i < len(lines) and lines[i] == ln:
+                self.masks[i] |= mask
+            else:
+                lines.insert(i, ln)
+                self.masks.insert(i, mask)
+
+    def get(self, ln: int, default: int = 0) -> int:
+        i = bisect_left(self.lines, ln)
+        if i < len(self.lines) and self.lines[i] == ln:
+            return self.masks[i]
+        return default
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.lines, self.masks)
+
+    def update(self, other: 'Posting'):
+        if other.lines and (not self.lines or other.lines[0] > self.lines[-1]):
+            self.lines.extend(other.lines)
+            self.masks.extend(other.masks)
+        else:
+            for ln, mask in other.items():
+                self.add(ln, mask)
+
+class KeywordIndex:
     """
-    sc_df를 기준으로 system_prompt 전략을 적용해
-    - expected_keywords: kw -> {line_numbers}
-    - expected_strategy : kw -> strategy_name(최초)
-    - bad_scope_map     : kw -> BAD_SCOPE 여부
+    정규화 키워드 → Posting(line_number → 전략 비트마스크) 역색인(1회 구축).
+    비트마스크는 해당 라인에서 그 키워드를 재현하는 전략들의 집합이고,
+    row_strategy는 각 라인에 실제 적용된 전략 비트다.
+    라인 검증/리포트는 이 색인 조회만으로 끝난다(재추출 없음).
+    """
+    __slots__ = ('postings', 'row_strategy')
+
+    def __init__(self):
+        self.postings: Dict[str, Posting] = {}
+        self.row_strategy: Dict[int, int] = {}
+
+    def _posting(self, kw: str) -> Posting:
+        posting = self.postings.get(kw)
+        if posting is None:
+            posting = self.postings[kw] = Posting()
+        return posting
+
+    def add_row(self, ln: int, parsed: RowParse):
+        self.row_strategy[ln] = STRATEGY_BITS[parsed.strategy]
+        row: Dict[str, int] = {}
+        for name, names in parsed.by_strategy.items():
+            bit = STRATEGY_BITS[name]
+            for kw in names:
+                row[kw] = row.get(kw, 0) | bit
+        for kw, mask in row.items():
+            self._posting(kw).add(ln, mask)
+
+    def reproduces(self, kw: str, ln: int, strat_name: str) -> bool:
+        """기록된 전략으로 재현되는지, 실패 시 그 라인 자체의 전략으로 재현되는지 확인"""
+        posting = self.postings.get(kw)
+        mask = posting.get(ln) if posting is not None else 0
+        if not mask:  # 범위 밖/빈 응답 라인 포함
+            return False
+        bit = STRATEGY_BITS.get(strat_name, STRATEGY_BITS['strat_comma'])
+        return bool(mask & (bit | self.row_strategy[ln]))
+
+    def merge(self, other: 'KeywordIndex'):
+        """다른 샤드의 색인 병합(샤드 간 라인은 겹치지 않음)"""
+        self.row_strategy.update(other.row_strategy)
+        for kw, posting in other.postings.items():
+            mine = self.postings.get(kw)
+            if mine is None:
+                self.postings[kw] = posting
+            else:
+                mine.update(posting)
+
+# -----------------------------
+# 키워드 테이블(메모리 압축형)
+#   키워드 1개 = __slots__ 레코드 1개
+#     name          : sys.intern 된 정규화 이름
+#     lines         : 정렬된 라인 번호 array('I') (int 집합 대비 원소당 4바이트)
+#     strategy      : STRATEGY 코드(작은 정수)
+#     classification: CLASSIFICATION 코드(판정 전 None)
+#   SC 기대 매핑과 지난 실행 결과(prev) 모두 이 테이블로 들고 있는다.
+# -----------------------------
+class CodeBook:
+    """문자열 ↔ 작은 정수 코드(처음 보는 값은 뒤에 추가)"""
+    __slots__ = ('names', 'codes')
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for name in names:
+            self.code(name)
+
+    def code(self, name: str) -> int:
+        c = self.codes.get(name)
+        if c is None:
+            c = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return c
+
+    def name(self, code: int) -> str:
+        return self.names[code]
+
+STRATEGY = CodeBook(STRATEGY_CORES)
+CLASSIFICATION = CodeBook(['NPM Package', 'Unknown/Invalid', 'Built-in Module', 'JS Keyword/Concept', 'Pending'])
+
+class KeywordRecord:
+    __slots__ = ('name', 'lines', 'strategy', 'bad_scope', 'classification', 'exists', 'registry_status')
+
+    def __init__(self, name: str, strategy: int, lines: Iterable[int] = (), bad_scope: bool = False,
+                 classification: Optional[int] = None, exists: bool = False,
+                 registry_status: Optional[str] = None):
+        self.name = sys.intern(name)
+        self.lines = array('I', lines)
+        self.strategy = strategy
+        self.bad_scope = bad_scope
+        self.classification = classification
+        self.exists = exists
+        self.registry_status = registry_status  # 레지스트리 판정 상태(로컬 분류/알 수 없음 = None)
+
+    def add_line(self, ln: int):
+        lines = self.lines
+        if not lines or ln > lines[-1]:
+            lines.append(ln)
+        elif lines[bisect_left(lines, ln)] != ln:
+            lines.insert(bisect_left(lines, ln), ln)
+
+    def merge_lines(self, other: array):
+        if other and (not self.lines or other[0] > self.lines[-1]):
+            self.lines.extend(other)
+        else:
+            self.lines = array('I', sorted(set(self.lines).union(other)))
+
+class KeywordTable:
+    """정규화 키워드 → KeywordRecord"""
+    __slots__ = ('records',)
+
+    def __init__(self):
+        self.records: Dict[str, KeywordRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.records
+
+    def get(self, name: str) -> Optional[KeywordRecord]:
+        return self.records.get(name)
+
+    def names(self) -> List[str]:
+        return sorted(self.records)
+
+    def add(self, name: str, ln: int, strategy: int, bad_scope: bool):
+        """name이 ln번 라인에서 추출됨(전략은 처음 본 행의 것을 유지, BAD_SCOPE는 OR)"""
+        rec = self.records.get(name)
+        if rec is None:
+            rec = self.records[name] = KeywordRecord(name, strategy)
+        rec.add_line(ln)
+        rec.bad_scope = rec.bad_scope or bad_scope
+
+    def merge(self, other: 'KeywordTable'):
+        """뒤따르는 샤드의 테이블 병합(앞선 샤드의 전략 우선)"""
+        for name, orec in other.records.items():
+            rec = self.records.get(name)
+            if rec is None:
+                self.records[name] = orec
+            else:
+                rec.merge_lines(orec.lines)
+                rec.bad_scope = rec.bad_scope or orec.bad_scope
+
+    def is_bad_scope(self, name: str) -> bool:
+        rec = self.records.get(name)
+        return rec is not None and rec.bad_scope
+
+    @classmethod
+    def from_results(cls, results: Dict[str, Dict]) -> 'KeywordTable':
+        """저널/이전 CSV의 keyword -> {line_numbers, strategy, classification, exists, registry_status} 결과를 테이블로"""
+        table = cls()
+        for name, r in results.items():
+            exists = _exists_flag(r.get('exists'))
+            status = r.get('registry_status')
+            if status not in (STATUS_EXISTS, STATUS_MISSING, STATUS_ERROR):
+                # 상태가 없는 예전 기록: 존재 판정은 오류에서 나올 수 없으므로 exists, 나머지는 알 수 없음
+                status = STATUS_EXISTS if exists else None
+            table.records[name] = KeywordRecord(
+                name, STRATEGY.code(str(r.get('strategy', ''))),
+                [ln for ln in r.get('line_numbers', []) if 0 <= ln <= 0xFFFFFFFF],  # array('I') 범위 밖은 어차피 재현 불가
+                classification=CLASSIFICATION.code(str(r.get('classification', 'Pending'))),
+                exists=exists, registry_status=status)
+        return table
+
+def _exists_flag(v) -> bool:
+    """저널(bool)/이전 CSV(bool, 빈 칸=NaN, 'True'/'False' 문자열)의 exists 값 → bool(알 수 없으면 False)"""
+    if isinstance(v, str):
+        return v.strip().lower() == 'true'
+    return v is not None and bool(pd.notna(v)) and bool(v)
+
+def classify_local(kw: str, bad_scope: bool) -> Optional[str]:
+    """레지스트리 조회 없이 확정되는 분류(없으면 None → 레지스트리 확인 필요)"""
+    if kw in NODE_BUILTINS:
+        return 'Built-in Module'
+    if kw in JS_KEYWORDS:
+        return 'JS Keyword/Concept'
+    if bad_scope:
+        # @scope 단독: 유지하되 Invalid로 고정
+        return 'Unknown/Invalid'
+    return None
+
+ExpectedShard = Tuple[KeywordTable, KeywordIndex]
+
+def sc_rows(sc_df: pd.DataFrame) -> List[Tuple[int, str, str]]:
+    """응답이 비어 있지 않은 행의 (line_number, system_prompt, response) 목록"""
+    sps = [str(x) for x in sc_df[SYSTEM_COL]] if SYSTEM_COL in sc_df.columns else [""] * len(sc_df)
+    rps = [str(x) for x in sc_df[RESPONSE_COL]] if RESPONSE_COL in sc_df.columns else [""] * len(sc_df)
+    return [
+        (idx + 2, sp, rp)  # header 고려(사람 기준 1-based)
+        for idx, sp, rp in zip(sc_df.index, sps, rps)
+        if rp.strip()
+    ]
+
+def row_hash(system_prompt: str, response: str) -> str:
+    return hashlib.blake2b(f"{system_prompt}\x00{response}".encode('utf-8'), digest_size=16).hexdigest()
+
+def _aggregate(parsed_rows: List[Tuple[int, RowParse]]) -> ExpectedShard:
+    table = KeywordTable()
+    kw_index = KeywordIndex()
+
+    for ln, parsed in parsed_rows:
+        kw_index.add_row(ln, parsed)
+        strategy = STRATEGY.code(parsed.strategy)
+        for norm, bad_scope in parsed.names.items():
+            table.add(norm, ln, strategy, bad_scope)
+
+    return table, kw_index
+
+def extract_shard(rows: List[Tuple[int, str, str]]) -> ExpectedShard:
+    """
+    (line_number, system_prompt, response) 묶음 하나를 추출해 부분 매핑을 만든다.
+    ProcessPoolExecutor 워커에서도 그대로 호출된다(모듈 최상위 함수).
+    """
+    parsed_rows = parse_rows([sp for _, sp, _ in rows], [rp for _, _, rp in rows])
+    return _aggregate([(ln, parsed) for (ln, _, _), parsed in zip(rows, parsed_rows)])
+
+def extract_store_shard(store_path: str, lines: List[int]) -> ExpectedShard:
+    """응답 저장소 경로 + 행 번호 묶음으로 샤드 추출(워커는 행 사본 대신 같은 mmap 파일을 연다)"""
+    return extract_shard(list(open_store(store_path).rows(lines)))
+
+def _merge_parts(parts: List[ExpectedShard]) -> ExpectedShard:
+    table = KeywordTable()
+    kw_index = KeywordIndex()
+    for part_table, part_index in parts:  # 샤드 순서 = 행 순서
+        table.merge(part_table)
+        kw_index.merge(part_index)
+    return table, kw_index
+
+def build_expected(source, workers: int = None,
+                   reuse: Optional[Dict[int, RowParse]] = None,
+                   lines: Optional[Iterable[int]] = None) -> ExpectedShard:
+    """
+    source(응답 DataFrame 또는 ResponseStore)를 기준으로 system_prompt 전략을 적용해
+    - table   : kw -> KeywordRecord(기대 라인, 최초 전략, BAD_SCOPE 여부)
+    - kw_index: kw -> {line_number: 전략 비트} 역색인(라인 검증/리포트용)
     를 구축한다.
+    workers > 1이면 SHARD_SIZE 행 단위 샤드를 프로세스 풀에서 추출하고,
+    샤드 순서대로 병합해 단일 프로세스 실행과 동일한 결과를 만든다.
+    reuse(line_number -> RowParse)에 있는 행은 추출하지 않고 저장된 결과를 그대로 쓴다.
+    ResponseStore면 샤드에는 행 번호만 담고, 텍스트는 추출 직전에 저장소에서 읽는다.
+    lines: ResponseStore의 대상 행 번호(이미 훑은 호출자가 넘김, 없으면 전체 행 — 빈 응답은 추출 시 걸러짐).
     """
-    expected_keywords: Dict[str, Set[int]] = defaultdict(set)
-    expected_strategy: Dict[str, str] = {}
-    bad_scope_map: Dict[str, bool] = {}
-
-    for idx, row in sc_df.iterrows():
-        sp = str(row.get(SYSTEM_COL, "")) if SYSTEM_COL in sc_df.columns else ""
-        rp = str(row.get(RESPONSE_COL, "")) if RESPONSE_COL in sc_df.columns else ""
-        if not rp.strip():
-            continue
-        fn, strat_name = choose_strategy(sp)
-        cands = fn(rp)
-        if not cands and fn is not strat_fallback:
-            cands = strat_fallback(rp)
-            strat_name = 'strat_fallback'
-        for raw in cands:
-            norm, bad_scope = normalize_npm_name(raw)
-            if not norm: continue
-            ln = idx + 2  # header 고려(사람 기준 1-based)
-            expected_keywords[norm].add(ln)
-            expected_strategy.setdefault(norm, strat_name)
-            bad_scope_map[norm] = bad_scope_map.get(norm, False) or bad_scope
-
-    return expected_keywords, expected_strategy, bad_scope_map
+    workers = EXTRACT_WORKERS if workers is None else workers
+    reuse = reuse or {}
+    store = source if isinstance(source, ResponseStore) else None
+    if store is not None:
+        # 행 번호만 필요하므로 텍스트를 디코딩하지 않는다
+        lines = range(FIRST_LINE, FIRST_LINE + store.n_rows) if lines is None else lines
+        rows = ((ln,) for ln in lines)
+    else:
+        rows = sc_rows(source)
+
+    # 행 순서대로 '재사용 구간'과 '추출 샤드'를 나눈다(병합 순서 = 행 순서)
+    segments: List[Tuple[bool, list]] = []
+    for row in rows:
+        reused = row[0] in reuse
+        if not segments or segments[-1][0] != reused or (not reused and len(segments[-1][1]) >= SHARD_SIZE):
+            segments.append((reused, []))
+        segments[-1][1].append((row[0], reuse[row[0]]) if reused else (row[0] if store is not None else row))
+
+    extract = [seg for reused, seg in segments if not reused]
+    if workers > 1 and len(extract) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            # map은 입력(샤드) 순서 유지
+            if store is not None:
+                extracted = iter(list(ex.map(extract_store_shard, [store.path] * len(extract), extract)))
+            else:
+                extracted = iter(list(ex.map(extract_shard, extract)))
+    elif store is not None:
+        extracted = iter([extract_shard(list(store.rows(seg))) for seg in extract])
+    else:
+        extracted = iter([extract_shard(seg) for seg in extract])
+
+    parts = [_aggregate(seg) if reused else next(extracted) for reused, seg in segments]
+    if len(parts) == 1:
+        return parts[0]
+    return _merge_parts(parts)
 
 # -----------------------------
-# 메인 실행
+# 행 상태 저장(증분 재실행용): 행 해시 + 그 행의 추출 결과
 # -----------------------------
-def main():
-    if not os.path.exists(INPUT_FILE):
-        print(f"입력 파일({INPUT_FILE})을 찾을 수 없습니다.")
-        sys.exit(1)
-
-    sc = pd.read_csv(INPUT_FILE)
-    if SYSTEM_COL not in sc.columns or RESPONSE_COL not in sc.columns:
-        print(f"'{SYSTEM_COL}', '{RESPONSE_COL}' 열을 찾을 수 없습니다.")
-        sys.exit(1)
-
-    # 0) SC 기준 기대 매핑 구축(정답 레퍼런스 역할)
-    expected_kw_map, expected_strat_map, expected_bad_scope_map = build_expected(sc)
-    expected_set = set(expected_kw_map.keys())
-
-    # 1) 체크포인트 로드
-    existing = None
-    if RESUME and os.path.exists(OUTPUT_FILE):
+def save_row_state(path: str, hashes: Dict[int, str], kw_index: KeywordIndex, table: KeywordTable):
+    """역색인을 행 단위로 뒤집어 {ln, hash, strategy, keywords(kw -> 전략 비트)} JSONL로 저장"""
+    by_row: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for kw, posting in kw_index.postings.items():
+        for ln, mask in posting.items():
+            by_row[ln][kw] = mask
+    bit_names = {bit: name for name, bit in STRATEGY_BITS.items()}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"_version": EXTRACTOR_VERSION}) + "\n")
+        for ln in sorted(kw_index.row_strategy):
+            kws = by_row.get(ln, {})
+            f.write(json.dumps({
+                "ln": ln,
+                "h": hashes[ln],
+                "s": bit_names[kw_index.row_strategy[ln]],
+                "k": kws,
+                "b": [kw for kw in kws if table.is_bad_scope(kw)],
+            }, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+def load_row_state(path: str, hashes: Dict[int, str]) -> Dict[int, RowParse]:
+    """저장된 행 중 현재 해시와 같은 행만 RowParse로 복원(버전이 다르면 전부 무효)"""
+    reuse: Dict[int, RowParse] = {}
+    if not os.path.exists(path):
+        return reuse
+    with open(path, 'r', encoding='utf-8') as f:
         try:
-            existing = pd.read_csv(OUTPUT_FILE)
-            print(f"기존 결과 로드: {len(existing)} rows")
-        except Exception as e:
-            print(f"기존 결과 로드 실패(무시): {e}")
-            existing = None
-
-    # 2) 작업 대상 키워드 집합(= expected_set) 기준으로 생성/업데이트
-    records = []
-    # 기존 결과를 dict로 맵핑(병합시 사용)
-    prev_map: Dict[str, Dict] = {}
-    if existing is not None and 'keyword' in existing.columns:
-        for _, row in existing.iterrows():
-            prev_map[str(row['keyword'])] = {
-                'classification': row.get('classification','Pending'),
-                'exists': row.get('exists',''),
-                'strategy': row.get('strategy', row.get('strategy_used','')),
-                'line_numbers': parse_line_list(row.get('line_numbers',''))
+            header = json.loads(f.readline())
+        except ValueError:
+            return reuse
+        if header.get("_version") != EXTRACTOR_VERSION:
+            return reuse
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            ln = rec["ln"]
+            if hashes.get(ln) != rec["h"]:
+                continue
+            strat_name, kws, bad = rec["s"], rec["k"], set(rec["b"])
+            by_strategy = {
+                name: frozenset(sys.intern(kw) for kw, mask in kws.items() if mask & bit)
+                for name, bit in STRATEGY_BITS.items()
             }
+            names = {kw: kw in bad for kw in by_strategy[strat_name]}
+            reuse[ln] = RowParse(strat_name, names, by_strategy)
+    return reuse
 
-    # 3) expected 기준으로 라인 검증 + 결과 구성
-    processed = 0
-    total = len(expected_set)
-    print(f"총 {total}개의 npm 후보(기대값 기준)를 분석합니다.")
-
-    for kw in sorted(expected_set):
-        exp_lines = sorted(list(expected_kw_map.get(kw, set())))
-        strat_name = expected_strat_map.get(kw, 'strat_comma')
-        bad_scope = expected_bad_scope_map.get(kw, False)
-
-        # 기존 라인과 병합(있다면)
-        merged_lines = set(exp_lines)
-        if kw in prev_map:
-            merged_lines |= set(prev_map[kw].get('line_numbers', []))
-
-        # 라인 검증: 각 라인에서 실제로 재현되는지 확인
-        valid_lines = []
-        # 전략 함수 선택
-        strat_fn = None
-        for key, fn in [
-            ('strat_comma', strat_comma),
-            ('strat_newline', strat_newline),
-            ('strat_json', strat_json),
-            ('strat_import', strat_import),
-            ('strat_npm_install', strat_npm_install),
-            ('strat_bullet', strat_bullet),
-            ('strat_fallback', strat_fallback),
-        ]:
-            if key == strat_name:
-                strat_fn = fn
-                break
-        if strat_fn is None:
-            strat_fn = strat_comma
-
-        for ln in sorted(merged_lines):
-            sc_idx = ln - 2
-            if sc_idx < 0 or sc_idx >= len(sc):  # 범위 밖 라인 제거
-                continue
-            rp = str(sc.loc[sc_idx, RESPONSE_COL]) if RESPONSE_COL in sc.columns else ""
-            sp = str(sc.loc[sc_idx, SYSTEM_COL]) if SYSTEM_COL in sc.columns else ""
-            # 우선 기록된 전략으로 검사, 실패시 system_prompt로 재선택 후 재시도
-            cands = strat_fn(rp) if rp else []
-            if not cands and strat_fn is not strat_fallback:
-                cands = strat_fallback(rp)
-            normed = set(n for n,_bad in (normalize_npm_name(x) for x in cands) if n)
-            if kw not in normed:
-                # 재선택
-                fn2, _ = choose_strategy(sp)
-                c2 = fn2(rp) if rp else []
-                if not c2 and fn2 is not strat_fallback:
-                    c2 = strat_fallback(rp)
-                normed2 = set(n for n,_bad in (normalize_npm_name(x) for x in c2) if n)
-                if kw in normed2:
-                    valid_lines.append(ln)
+# -----------------------------
+# 모델 1개 단위 실행 단계
+# -----------------------------
+class ModelRun:
+    """
+    응답 CSV 1개(= 모델 1개)의 탐지 과정.
+      prepare() : 추출 → 체크포인트 로드 → 라인 검증 → 레지스트리 확인 대상(registry_kws) 결정
+      finalize(): registry_kws 순서의 판정을 받아 결과 구성 → 저장 → Diff 리포트
+    단일 실행(main)과 다중 모델 배치(main_batch)가 같은 단계를 공유한다.
+    """
+
+    def __init__(self, input_file: str, output_file: str, diff_prefix: str = "", model: Optional[str] = None):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.diff_prefix = diff_prefix
+        self.model = model or os.path.splitext(os.path.basename(output_file))[0]
+        self.row_sets: Optional[RowSetIndex] = None  # ROW_SETS일 때만 finalize에서 생성
+
+    def prepare(self):
+        if not os.path.exists(self.input_file):
+            print(f"입력 파일({self.input_file})을 찾을 수 없습니다.")
+            sys.exit(1)
+
+        with metrics.stage('load'):
+            if RESPONSE_STORE:
+                columns = pd.read_csv(self.input_file, nrows=0).columns
             else:
-                valid_lines.append(ln)
-
-        # 존재성 확인 및 분류
-        if kw in NODE_BUILTINS:
-            classification = 'Built-in Module'
-            exists = False
-        elif kw in JS_KEYWORDS:
-            classification = 'JS Keyword/Concept'
-            exists = False
-        elif bad_scope:
-            # @scope 단독: 유지하되 Invalid로 고정
-            classification = 'Unknown/Invalid'
-            exists = False
-        else:
-            ex = exists_on_npm(kw)
-            classification = 'NPM Package' if ex else 'Unknown/Invalid'
-            exists = bool(ex)
-
-        # 전략 이름(우선 expected의 것, 없으면 prev/map의 것)
-        strategy_to_log = strat_name or (prev_map.get(kw, {}).get('strategy') if kw in prev_map else 'auto')
-
-        records.append({
-            'keyword': kw,
-            'line_numbers': sorted(valid_lines),  # 검증된 라인만 담기
-            'strategy': strategy_to_log,
-            'classification': classification,
-            'exists': exists
-        })
-
-        processed += 1
-        print(f"[{processed}/{total}] {kw:40s} -> {classification} ({strategy_to_log}), lines={len(valid_lines)}")
-        if RATE_SLEEP > 0: time.sleep(RATE_SLEEP)
-        if processed % SAVE_INTERVAL == 0:
-            save_csv(pd.DataFrame(records), OUTPUT_FILE)
-            print(f"체크포인트 저장: {processed}/{total}")
-
-    # 4) 최종 저장
-    final_df = pd.DataFrame(records).sort_values('keyword').reset_index(drop=True)
-    save_csv(final_df, OUTPUT_FILE)
-    print(f"결과 저장: {OUTPUT_FILE}")
-
-    # 5) 실행 후 SC↔FINAL 대조 리포트 자동 생성
-    #    (과추출/누락/라인 재현 실패)
-    # SC 재현(기대값)
-    exp_map, exp_strat_map, _ = expected_kw_map, expected_strat_map, expected_bad_scope_map
-    final_set = set(final_df['keyword'].astype(str))
-    extra_in_final = sorted(list(final_set - set(exp_map.keys())))
-    missing_in_final = sorted(list(set(exp_map.keys()) - final_set))
-
-    # 라인 재현 실패(최종 결과의 각 line_numbers가 실제 그 줄에서 재현 가능한지 추가 점검)
-    mismatch_rows = []
-    strat_lookup = {
-        'strat_comma': strat_comma,
-        'strat_newline': strat_newline,
-        'strat_json': strat_json,
-        'strat_import': strat_import,
-        'strat_npm_install': strat_npm_install,
-        'strat_bullet': strat_bullet,
-        'strat_fallback': strat_fallback,
-    }
-    for i, row in final_df.iterrows():
-        kw = row['keyword']
-        strat_name = str(row.get('strategy','strat_comma'))
-        fn = strat_lookup.get(strat_name, strat_comma)
-        for ln in row['line_numbers']:
-            sc_idx = ln - 2
-            if sc_idx < 0 or sc_idx >= len(sc):
-                mismatch_rows.append((i, kw, ln, 'line_oob'))
-                continue
-            rp = str(sc.loc[sc_idx, RESPONSE_COL]) if RESPONSE_COL in sc.columns else ""
-            sp = str(sc.loc[sc_idx, SYSTEM_COL]) if SYSTEM_COL in sc.columns else ""
-            c1 = fn(rp) if rp else []
-            if not c1 and fn is not strat_fallback:
-                c1 = strat_fallback(rp)
-            norm1 = set(n for n,_ in (normalize_npm_name(x) for x in c1) if n)
-            if kw not in norm1:
-                # 재선택 후 재검증
-                fn2, _ = choose_strategy(sp)
-                c2 = fn2(rp) if rp else []
-                if not c2 and fn2 is not strat_fallback:
-                    c2 = strat_fallback(rp)
-                norm2 = set(n for n,_ in (normalize_npm_name(x) for x in c2) if n)
-                if kw not in norm2:
+                sc = pd.read_csv(self.input_file)
+                columns = sc.columns
+            if SYSTEM_COL not in columns or RESPONSE_COL not in columns:
+                print(f"'{SYSTEM_COL}', '{RESPONSE_COL}' 열을 찾을 수 없습니다.")
+                sys.exit(1)
+            if RESPONSE_STORE:
+                # 행 번호로 바로 읽는 mmap 저장소(원본이 바뀌었을 때만 다시 변환)
+                sc = ensure_store(self.input_file, SYSTEM_COL, RESPONSE_COL)
+        self.n_rows = len(sc)
+
+        # 0) SC 기준 기대 매핑 구축(정답 레퍼런스 역할)
+        #    증분 모드: 해시가 같은 행은 지난 실행의 추출 결과 재사용
+        with metrics.stage('build_expected'):
+            self.row_state_path = self.output_file + ".rows.jsonl"
+            self.row_hashes: Dict[int, str] = {}
+            prompt_lines: Dict[str, List[int]] = defaultdict(list)
+            for ln, sp, rp in (sc.rows() if RESPONSE_STORE else sc_rows(sc)):
+                self.row_hashes[ln] = row_hash(sp, rp)
+                prompt_lines[sp].append(ln)
+            self.prompt_rows = {sp: RowBitmap(lines) for sp, lines in prompt_lines.items()}
+            del prompt_lines
+            reuse = load_row_state(self.row_state_path, self.row_hashes) if (RESUME and INCREMENTAL) else {}
+            if reuse:
+                print(f"증분 추출: {len(reuse)}/{len(self.row_hashes)}행 재사용, {len(self.row_hashes) - len(reuse)}행 재추출")
+            # 행 번호는 위 한 번의 순회 결과(row_hashes: 빈 응답 제외, 행 순서)를 그대로 사용
+            self.table, self.kw_index = build_expected(sc, reuse=reuse, lines=self.row_hashes if RESPONSE_STORE else None)
+        del sc
+        fallback_bit = STRATEGY_BITS['strat_fallback']
+        metrics.count('rows', self.n_rows)
+        metrics.count('rows_reused', len(reuse))
+        metrics.count('strategy_fallback_rows', sum(b == fallback_bit for b in self.kw_index.row_strategy.values()))
+
+        # 1) 체크포인트 로드: 저널 재생(없으면 예전 형식의 OUTPUT_FILE CSV)
+        with metrics.stage('checkpoint_load'):
+            self.journal = ResultJournal(self.output_file + ".journal.jsonl")
+            # 기존 결과를 dict로 맵핑(라인 병합시 사용) / pending: 중단된 실행에서 이미 끝난 판정
+            prev_map: Dict[str, Dict] = {}
+            pending: Dict[str, Dict] = {}
+            from_journal = False
+            if RESUME and os.path.exists(self.journal.path):
+                prev_map, pending = self.journal.replay()
+                from_journal = True
+                print(f"저널 재생: {len(prev_map)} keywords (중단된 실행 {len(pending)}건 재사용)")
+            elif RESUME and os.path.exists(self.output_file):
+                try:
+                    existing = pd.read_csv(self.output_file)
+                    print(f"기존 결과 로드: {len(existing)} rows")
+                except Exception as e:
+                    print(f"기존 결과 로드 실패(무시): {e}")
+                    existing = None
+                if existing is not None and 'keyword' in existing.columns:
+                    for _, row in existing.iterrows():
+                        prev_map[str(row['keyword'])] = {
+                            'classification': row.get('classification','Pending'),
+                            'exists': row.get('exists',''),
+                            'strategy': row.get('strategy', row.get('strategy_used','')),
+                            'line_numbers': parse_line_list(row.get('line_numbers',''))
+                        }
+            elif not RESUME and os.path.exists(self.journal.path):
+                os.remove(self.journal.path)
+            # 지난 결과도 압축 테이블로(라인 리스트/dict 레코드는 여기서 버림)
+            self.prev = KeywordTable.from_results(prev_map)
+            pending_names = set(pending)
+            del prev_map, pending
+
+        # 2) 작업 대상 키워드 집합(= expected_set) 기준으로 라인 검증(역색인 조회)
+        #    검증이 끝나면 각 레코드의 lines는 '기대 라인'에서 '검증된 라인'으로 바뀐다
+        self.keywords = self.table.names()
+        print(f"총 {len(self.keywords)}개의 npm 후보(기대값 기준)를 분석합니다.")
+        with metrics.stage('validation'):
+            for kw in self.keywords:
+                rec = self.table.records[kw]
+                strat_name = STRATEGY.name(rec.strategy)
+                # 기존 라인과 병합(있다면)
+                prev = self.prev.get(kw)
+                merged_lines = set(rec.lines).union(prev.lines) if prev is not None else rec.lines
+                rec.lines = array('I', [ln for ln in sorted(merged_lines) if self.kw_index.reproduces(kw, ln, strat_name)])
+
+        # 판정 재사용: 중단된 실행의 판정 + (증분 모드) 라인 집합/전략이 그대로인 지난 판정
+        #   레지스트리가 exists/missing으로 답한 판정만 재사용(오류 → Unknown/Invalid 판정은 다시 확인,
+        #   VerdictCache가 error_ttl=0으로 오류를 캐시하지 않는 것과 같은 규칙)
+        reusable = {kw for kw, prev in self.prev.records.items() if prev.registry_status in REUSABLE_STATUSES}
+        self.reused: Set[str] = pending_names & reusable
+        if INCREMENTAL and from_journal:
+            for kw in self.keywords:
+                prev, rec = self.prev.get(kw), self.table.records[kw]
+                if (kw not in self.reused and kw in reusable
+                        and prev.lines == rec.lines and prev.strategy == rec.strategy):
+                    self.reused.add(kw)
+            print(f"판정 이월: {len(self.reused)}/{len(self.keywords)} keywords (레지스트리 재확인 생략)")
+        rechecked = sum(1 for kw in self.keywords
+                        if kw in self.prev.records and self.prev.records[kw].registry_status == STATUS_ERROR)
+        if rechecked:
+            print(f"오류 판정 재확인: {rechecked} keywords")
+
+        # 레지스트리 확인이 필요한 키워드(키워드 순서)
+        self.registry_kws = [
+            kw for kw in self.keywords
+            if kw not in self.reused and classify_local(kw, self.table.records[kw].bad_scope) is None
+        ]
+        metrics.count('keywords', len(self.keywords))
+        metrics.count('keywords_reused', len(self.reused))
+        metrics.count('registry_keywords', len(self.registry_kws))
+
+    def finalize(self, verdicts: Iterator[str]) -> pd.DataFrame:
+        """verdicts: registry_kws와 같은 순서의 레지스트리 판정 상태('exists' | 'missing' | 'error')"""
+        # 3) expected 기준으로 결과 구성(판정은 테이블 레코드에 코드로 기록)
+        processed = 0
+        total = len(self.keywords)
+        for kw in self.keywords:
+            rec = self.table.records[kw]
+            strategy_to_log = STRATEGY.name(rec.strategy)
+
+            # 존재성 확인 및 분류
+            classification = classify_local(kw, rec.bad_scope)
+            status = None
+            if kw in self.reused:
+                prev = self.prev.records[kw]
+                classification = CLASSIFICATION.name(prev.classification)
+                exists = prev.exists
+                status = prev.registry_status
+            elif classification is not None:
+                exists = False
+            else:
+                status = next(verdicts)
+                exists = status == STATUS_EXISTS
+                classification = 'NPM Package' if exists else 'Unknown/Invalid'
+            rec.classification = CLASSIFICATION.code(classification)
+            rec.exists = exists
+            rec.registry_status = status
+
+            if kw not in self.reused:
+                # 완료 즉시 저널에 한 줄 추가(검증된 라인만 담기)
+                self.journal.append({
+                    'keyword': kw,
+                    'line_numbers': rec.lines.tolist(),
+                    'strategy': strategy_to_log,
+                    'classification': classification,
+                    'exists': exists,
+                    'registry_status': status
+                })
+
+            processed += 1
+            print(f"[{processed}/{total}] {kw:40s} -> {classification} ({strategy_to_log}), lines={len(rec.lines)}")
+            if processed % SAVE_INTERVAL == 0:
+                with metrics.stage('checkpoint'):
+                    self.journal.sync()
+                print(f"체크포인트 저장: {processed}/{total}")
+
+        # 4) 최종 저장(CSV는 여기서 한 번만 생성) → 저널을 최종 레코드로 압축
+        final_df = self.result_frame()
+        journal_records = final_df.to_dict('records')  # 제안 열은 색인에서 다시 계산하므로 저널에 두지 않음
+        for record in journal_records:  # 판정 상태는 저널에만 기록(다음 실행의 재사용 여부 판단용)
+            record['registry_status'] = self.table.records[record['keyword']].registry_status
+        with metrics.stage('suggest'):
+            final_df = add_suggestions(final_df)
+        with metrics.stage('save'):
+            written = save_table(final_df, self.output_file,
+                                 list_cols=('line_numbers',), dict_cols=('strategy', 'classification'),
+                                 str_list_cols=('all_suggested_packages',))
+            self.journal.compact(journal_records)
+            save_row_state(self.row_state_path, self.row_hashes, self.kw_index, self.table)
+            if ROW_SETS:
+                self.row_sets = self.build_row_sets()
+                self.row_sets.save(self.output_file + ".rowsets")
+                metrics.count('bytes_written', os.path.getsize(self.output_file + ".rowsets"))
+        metrics.count('bytes_written', self.journal.bytes_written
+                      + os.path.getsize(self.journal.path) + os.path.getsize(self.row_state_path))
+        print(f"결과 저장: {', '.join(written)}")
+
+        with metrics.stage('diff'):
+            self.write_diff_reports(final_df)
+        return final_df
+
+    def build_row_sets(self) -> RowSetIndex:
+        """
+        행 비트맵 색인(행 번호 = 결과의 line_number):
+          keyword:<모델>  키워드별 검증된 라인       hallucinated  모델별 Unknown/Invalid 키워드가 나온 행
+          answered        모델별 응답이 있는 행      strategy:<모델> 행에 적용된 전략별 행
+          prompt          system prompt 원문별 행
+        """
+        index = RowSetIndex()
+        invalid = CLASSIFICATION.code('Unknown/Invalid')
+        recs = [self.table.records[kw] for kw in self.keywords]
+        for rec in recs:
+            index.put(f"keyword:{self.model}", rec.name, RowBitmap(rec.lines))
+        index.put('hallucinated', self.model,
+                  RowBitmap(ln for rec in recs if rec.classification == invalid for ln in rec.lines))
+        index.put('answered', self.model, RowBitmap(self.row_hashes))
+        by_bit: Dict[int, List[int]] = defaultdict(list)
+        for ln, bit in self.kw_index.row_strategy.items():
+            by_bit[bit].append(ln)
+        for name, bit in STRATEGY_BITS.items():
+            if bit in by_bit:
+                index.put(f"strategy:{self.model}", name, RowBitmap(by_bit[bit]))
+        for sp, bm in self.prompt_rows.items():
+            index.put('prompt', sp, bm)
+        return index
+
+    def result_frame(self) -> pd.DataFrame:
+        """테이블(키워드 순) → 최종 결과 DataFrame(FINAL 열 구성)"""
+        recs = [self.table.records[kw] for kw in self.keywords]
+        return pd.DataFrame({
+            'keyword': [r.name for r in recs],
+            'line_numbers': [r.lines.tolist() for r in recs],
+            'strategy': [STRATEGY.name(r.strategy) for r in recs],
+            'classification': [CLASSIFICATION.name(r.classification) for r in recs],
+            'exists': [r.exists for r in recs],
+        }, columns=['keyword', 'line_numbers', 'strategy', 'classification', 'exists'])
+
+    def write_diff_reports(self, final_df: pd.DataFrame):
+        # 5) 실행 후 SC↔FINAL 대조 리포트 자동 생성
+        #    (과추출/누락/라인 재현 실패)
+        exp_keys = set(self.table.records)
+        final_set = set(final_df['keyword'].astype(str))
+        extra_in_final = sorted(list(final_set - exp_keys))
+        missing_in_final = sorted(list(exp_keys - final_set))
+
+        # 라인 재현 실패(최종 결과의 각 line_numbers가 실제 그 줄에서 재현 가능한지 추가 점검)
+        mismatch_rows = []
+        for i, row in final_df.iterrows():
+            kw = row['keyword']
+            strat_name = str(row.get('strategy','strat_comma'))
+            for ln in row['line_numbers']:
+                sc_idx = ln - 2
+                if sc_idx < 0 or sc_idx >= self.n_rows:
+                    mismatch_rows.append((i, kw, ln, 'line_oob'))
+                    continue
+                if not self.kw_index.reproduces(kw, ln, strat_name):
                     mismatch_rows.append((i, kw, ln, 'not_found_in_line'))
 
-    extra_df = pd.DataFrame({"keyword_extra_in_final": extra_in_final})
-    missing_df = pd.DataFrame({"keyword_missing_in_final": missing_in_final})
-    mismatch_df = pd.DataFrame(mismatch_rows, columns=["final_row_index","keyword","line_number","reason"])
+        extra_df = pd.DataFrame({"keyword_extra_in_final": extra_in_final})
+        missing_df = pd.DataFrame({"keyword_missing_in_final": missing_in_final})
+        mismatch_df = pd.DataFrame(mismatch_rows, columns=["final_row_index","keyword","line_number","reason"]) \
+            .astype({"final_row_index": "int64", "line_number": "int64"})
+
+        extra_path = f"{self.diff_prefix}diff_extra_in_final.csv"
+        missing_path = f"{self.diff_prefix}diff_missing_in_final.csv"
+        mismatch_path = f"{self.diff_prefix}diff_line_mismatch.csv"
+        extra_written = save_table(extra_df, extra_path)
+        missing_written = save_table(missing_df, missing_path)
+        mismatch_written = save_table(mismatch_df, mismatch_path, dict_cols=('keyword', 'reason'))
+
+        print(f"\nDiff 리포트 생성 완료({OUTPUT_FORMAT}):")
+        print(f"- 과추출(extra): {', '.join(extra_written)} ({len(extra_df)} rows)")
+        print(f"- 누락(missing):  {', '.join(missing_written)} ({len(missing_df)} rows)")
+        print(f"- 라인불일치:     {', '.join(mismatch_written)} ({len(mismatch_df)} rows)")
+
+def print_registry_summary():
+    metrics.count('registry_calls', registry_stats.checks)
+    metrics.count('registry_bytes_received', registry_stats.bytes)
+    if _cache is not None:
+        metrics.count('cache_hits', _cache.hits)
+        metrics.count('cache_misses', _cache.misses)
+        print(f"판정 캐시({REGISTRY_CACHE_FILE}): hit={_cache.hits}, miss={_cache.misses}")
+    if registry_stats.checks:
+        print(f"레지스트리 조회({REGISTRY_PROBE}): {registry_stats.checks}건, "
+              f"{registry_stats.bytes} bytes (평균 {registry_stats.bytes / registry_stats.checks:.0f} bytes/건)")
 
-    extra_path = "diff_extra_in_final.csv"
-    missing_path = "diff_missing_in_final.csv"
-    mismatch_path = "diff_line_mismatch.csv"
-    extra_df.to_csv(extra_path, index=False, encoding="utf-8-sig")
-    missing_df.to_csv(missing_path, index=False, encoding="utf-8-sig")
-    mismatch_df.to_csv(mismatch_path, index=False, encoding="utf-8-sig")
+def write_metrics(**extra):
+    """단계별 시간/카운터 요약표 출력 + METRICS_FILE(JSON) 저장"""
+    metrics.print_summary()
+    if METRICS_FILE:
+        metrics.save(METRICS_FILE, **extra,
+                     config={'extract_workers': EXTRACT_WORKERS, 'registry_probe': REGISTRY_PROBE,
+                             'registry_max_inflight': REGISTRY_MAX_INFLIGHT, 'incremental': INCREMENTAL,
+                             'output_format': OUTPUT_FORMAT})
+        print(f"실행 지표 저장: {METRICS_FILE}")
 
-    print("\nDiff 리포트 생성 완료:")
-    print(f"- 과추출(extra): {extra_path} ({len(extra_df)} rows)")
-    print(f"- 누락(missing):  {missing_path} ({len(missing_df)} rows)")
-    print(f"- 라인불일치:     {mismatch_path} ({len(mismatch_df)} rows)")
+# -----------------------------
+# 메인 실행
+# -----------------------------
+def main():
+    run = ModelRun(INPUT_FILE, OUTPUT_FILE)
+    run.prepare()
+    # 레지스트리 확인이 필요한 키워드만 동시 조회(결과는 키워드 순서로 소비)
+    run.finalize(metrics.timed_iter('registry', verify_on_npm(run.registry_kws)))
+    print_registry_summary()
+    write_metrics(input_file=INPUT_FILE, output_file=OUTPUT_FILE)
+
+def main_batch(models: Dict[str, Tuple[str, str]]):
+    """
+    여러 모델 응답 파일을 한 작업으로 처리.
+    모든 모델의 레지스트리 확인 대상을 합집합으로 중복 제거해 한 번만 조회하고,
+    모델별 FINAL 결과 + 모델 × 키워드 통합표(BATCH_COMBINED_FILE)를 만든다.
+    """
+    runs: Dict[str, ModelRun] = {}
+    for model, (input_file, output_file) in models.items():
+        print(f"\n===== [{model}] 추출 =====")
+        run = ModelRun(input_file, output_file, diff_prefix=f"{model}_", model=model)
+        run.prepare()
+        runs[model] = run
+
+    union = sorted(set().union(*(run.registry_kws for run in runs.values())))
+    total_refs = sum(len(run.registry_kws) for run in runs.values())
+    print(f"\n레지스트리 확인: 고유 {len(union)}개 (모델별 합계 {total_refs}개)")
+    with metrics.stage('registry'):
+        verdict_map = dict(zip(union, verify_on_npm(union)))
+
+    finals: Dict[str, pd.DataFrame] = {}
+    for model, run in runs.items():
+        print(f"\n===== [{model}] 결과 =====")
+        finals[model] = run.finalize(iter([verdict_map[kw] for kw in run.registry_kws]))
+    print_registry_summary()
+
+    # 모델 × 키워드 통합표: 판정(먼저 나온 모델 기준) + 모델별 등장 라인 수
+    combined: Dict[str, Dict] = {}
+    for model, final_df in finals.items():
+        for kw, lines, classification, exists in zip(final_df['keyword'], final_df['line_numbers'],
+                                                     final_df['classification'], final_df['exists']):
+            row = combined.setdefault(kw, {'keyword': kw, 'classification': classification, 'exists': exists})
+            row[model] = len(lines)
+    combined_df = pd.DataFrame(list(combined.values()), columns=['keyword', 'classification', 'exists', *finals])
+    combined_df[list(finals)] = combined_df[list(finals)].fillna(0).astype(int)
+    combined_df['n_models'] = (combined_df[list(finals)] > 0).sum(axis=1)
+    combined_df = combined_df.sort_values('keyword').reset_index(drop=True)
+    combined_written = save_table(combined_df, BATCH_COMBINED_FILE, dict_cols=('classification',))
+    print(f"통합 결과 저장: {', '.join(combined_written)} ({len(combined_df)} keywords x {len(finals)} models)")
+
+    # 모델 간 행 집합 질의용 통합 비트맵 색인(예: marin만 환각한 행 = hallucinated/marin - hallucinated/qwen)
+    if ROW_SETS:
+        row_sets = RowSetIndex()
+        for run in runs.values():
+            if run.row_sets is not None:
+                row_sets.merge(run.row_sets)
+        row_sets_path = os.path.splitext(BATCH_COMBINED_FILE)[0] + ".rowsets"
+        row_sets.save(row_sets_path)
+        print(f"행 비트맵 색인 저장: {row_sets_path} ({len(row_sets.sets)} sets)")
+    write_metrics(models=sorted(models))
 
 if __name__ == "__main__":
-    main()
+    if BATCH_MODELS:
+        main_batch(BATCH_MODELS)
+    else:
+        main()
@@ -0,0 +1,76 @@
+import sqlite3, threading, time
+from typing import Optional
+
+# -----------------------------
+# npm 레지스트리 판정 캐시(SQLite)
+#   - 키: 정규화된 패키지명
+#   - 값: 'exists' | 'missing'(404) | 'error' + HTTP 상태 + 조회 시각
+#   - WAL 모드 + busy timeout → 여러 프로세스/스레드가 같은 파일을 동시에 사용
+# -----------------------------
+STATUS_EXISTS  = 'exists'
+STATUS_MISSING = 'missing'
+STATUS_ERROR   = 'error'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    name        TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    http_status INTEGER,
+    checked_at  REAL NOT NULL
+)
+"""
+
+# 일시적 오류가 아직 쓸 수 있는 exists/missing 판정을 덮어쓰지 않도록 오류는 빈자리/기존 오류에만 기록
+UPSERT = """
+INSERT INTO verdicts (name, status, http_status, checked_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET status = excluded.status, http_status = excluded.http_status, checked_at = excluded.checked_at
+WHERE verdicts.status = 'error' OR excluded.status != 'error'
+"""
+
+class VerdictCache:
+    def __init__(self, path: str, positive_ttl: float, negative_ttl: float, error_ttl: float = 0.0):
+        """
+        Args:
+            path: SQLite 파일 경로(모델/실행 간 공유)
+            positive_ttl: 'exists' 판정 유효 시간(초)
+            negative_ttl: 'missing' 판정 유효 시간(초)
+            error_ttl: 'error' 판정 유효 시간(초, 0이면 캐시된 오류는 항상 재조회)
+        """
+        self.path = path
+        self.ttl = {
+            STATUS_EXISTS: positive_ttl,
+            STATUS_MISSING: negative_ttl,
+            STATUS_ERROR: error_ttl,
+        }
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._stat_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.execute(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션(sqlite3 커넥션은 스레드 간 공유하지 않음)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, name: str) -> Optional[str]:
+        """TTL 안의 판정이 있으면 status, 없거나 만료됐으면 None"""
+        row = self._conn().execute(
+            "SELECT status, checked_at FROM verdicts WHERE name = ?", (name,)
+        ).fetchone()
+        fresh = row is not None and time.time() - row[1] < self.ttl.get(row[0], 0.0)
+        with self._stat_lock:
+            if fresh: self.hits += 1
+            else: self.misses += 1
+        return row[0] if fresh else None
+
+    def put(self, name: str, status: str, http_status: Optional[int] = None):
+        conn = self._conn()
+        with conn:  # 자동 커밋(짧은 트랜잭션으로 다른 프로세스 대기 최소화)
+            conn.execute(UPSERT, (name, status, http_status, time.time()))
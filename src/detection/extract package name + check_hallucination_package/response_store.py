@@ -0,0 +1,147 @@
+import os, sys, mmap, struct, hashlib
+import pandas as pd
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# -----------------------------
+# 응답 CSV의 mmap 행 저장소(행 번호 → system prompt/응답 O(1) 조회)
+#   입력 CSV를 한 번 변환해 두고 mmap으로 열어 필요한 행만 꺼낸다(DataFrame 전체 로드 불필요).
+#   파일 구성(리틀엔디언):
+#     [헤더 48B] magic(8) | rows(u32) | pad(4) | src_size(u64) | src_mtime_ns(u64) | 열 이름 해시(8) | blob_len(u64)
+#     [blob]                     - 행 순서대로 system prompt, 응답의 UTF-8 바이트를 이어붙인 것
+#     [오프셋 (2*rows+1) x u64]  - 행 i의 system prompt는 [2i, 2i+1), 응답은 [2i+1, 2i+2)
+#   행 번호는 결과 CSV와 같은 기준(DataFrame index + 2, 헤더 포함 1-based).
+#   워커 프로세스는 같은 파일을 다시 열기만 하면 되고 페이지는 OS 캐시로 공유된다.
+# -----------------------------
+MAGIC = b'RSPSTR01'
+HEADER = struct.Struct('<8sI4xQQ8sQ')
+OFFSET = struct.Struct('<Q')
+ROW_OFFSETS = struct.Struct('<QQQ')
+FIRST_LINE = 2          # 0번 행의 line_number
+CHUNK_ROWS = 50000      # 변환 시 CSV를 읽는 행 묶음 크기
+
+def _columns_key(system_col: str, response_col: str) -> bytes:
+    return hashlib.blake2b(f"{system_col}\x00{response_col}".encode('utf-8'), digest_size=8).digest()
+
+def _source_stat(csv_path: str) -> Tuple[int, int]:
+    st = os.stat(csv_path)
+    return st.st_size, st.st_mtime_ns
+
+def build_store(csv_path: str, store_path: str, system_col: str, response_col: str) -> int:
+    """
+    CSV의 두 열을 저장소 파일로 변환, 기록한 행 수 반환.
+    셀 값은 pd.read_csv로 읽은 값을 str()로 바꾼 것(빈 셀 = 'nan')이라 DataFrame 경로와 같은 문자열이 된다.
+    """
+    src_size, src_mtime = _source_stat(csv_path)
+    offsets = bytearray()
+    pos = rows = 0
+    tmp_path = store_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(bytes(HEADER.size))  # 자리만 잡고 마지막에 기록
+        for chunk in pd.read_csv(csv_path, usecols=[system_col, response_col], chunksize=CHUNK_ROWS):
+            for sp, rp in zip(chunk[system_col], chunk[response_col]):
+                for text in (str(sp), str(rp)):
+                    data = text.encode('utf-8', 'surrogatepass')
+                    offsets += OFFSET.pack(pos)
+                    f.write(data)
+                    pos += len(data)
+                rows += 1
+        offsets += OFFSET.pack(pos)
+        f.write(offsets)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, rows, src_size, src_mtime, _columns_key(system_col, response_col), pos))
+    os.replace(tmp_path, store_path)
+    return rows
+
+class ResponseStore:
+    """build_store로 만든 파일을 mmap으로 열어 행 번호로 (system_prompt, response) 조회"""
+
+    def __init__(self, store_path: str):
+        self.path = store_path
+        self._f = open(store_path, 'rb')
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n_rows, self.src_size, self.src_mtime_ns, self.columns_key, blob_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"응답 저장소 형식이 아닙니다: {store_path}")
+        self._blob_start = HEADER.size
+        self._off_start = self._blob_start + blob_len
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def is_current(self, csv_path: str, system_col: str, response_col: str) -> bool:
+        """원본 CSV(크기/수정 시각)와 열 구성이 변환 당시와 같은지"""
+        return ((self.src_size, self.src_mtime_ns) == _source_stat(csv_path)
+                and self.columns_key == _columns_key(system_col, response_col))
+
+    def _text(self, a: int, b: int) -> str:
+        return self._mm[self._blob_start + a:self._blob_start + b].decode('utf-8', 'surrogatepass')
+
+    def row(self, ln: int) -> Tuple[str, str]:
+        i = ln - FIRST_LINE
+        if not 0 <= i < self.n_rows:
+            raise IndexError(f"line_number 범위 밖: {ln}")
+        a, b, c = ROW_OFFSETS.unpack_from(self._mm, self._off_start + 2 * i * OFFSET.size)
+        return self._text(a, b), self._text(b, c)
+
+    def system_prompt(self, ln: int) -> str:
+        return self.row(ln)[0]
+
+    def response(self, ln: int) -> str:
+        return self.row(ln)[1]
+
+    def rows(self, lines: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, str, str]]:
+        """응답이 비어 있지 않은 행의 (line_number, system_prompt, response), lines를 주면 그 행들만"""
+        if lines is None:
+            lines = range(FIRST_LINE, FIRST_LINE + self.n_rows)
+        for ln in lines:
+            sp, rp = self.row(ln)
+            if rp.strip():
+                yield ln, sp, rp
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+# 프로세스마다 경로별로 한 번만 연다(추출 워커가 샤드마다 다시 열지 않도록)
+_open_stores: Dict[str, ResponseStore] = {}
+
+def open_store(store_path: str) -> ResponseStore:
+    store = _open_stores.get(store_path)
+    if store is None:
+        store = _open_stores[store_path] = ResponseStore(store_path)
+    return store
+
+def ensure_store(csv_path: str, system_col: str, response_col: str, store_path: Optional[str] = None) -> ResponseStore:
+    """저장소가 없거나 원본 CSV가 바뀌었으면 다시 변환하고 연다"""
+    store_path = store_path or csv_path + ".rstore"
+    store = _open_stores.pop(store_path, None)
+    if store is None and os.path.exists(store_path):
+        try:
+            store = ResponseStore(store_path)
+        except (ValueError, struct.error):
+            store = None
+    if store is not None and not store.is_current(csv_path, system_col, response_col):
+        store.close()
+        store = None
+    if store is None:
+        n = build_store(csv_path, store_path, system_col, response_col)
+        print(f"응답 저장소 변환: {store_path} ({n} rows, {os.path.getsize(store_path)} bytes)")
+        store = ResponseStore(store_path)
+    _open_stores[store_path] = store
+    return store
+
+if __name__ == "__main__":
+    # 사용법: python response_store.py <응답 CSV> <저장소 파일> [system 열] [response 열]
+    #         python response_store.py <저장소 파일> <line_number>   (행 하나 출력)
+    if len(sys.argv) == 3 and sys.argv[2].isdigit():
+        s = ResponseStore(sys.argv[1])
+        sp, rp = s.row(int(sys.argv[2]))
+        print(f"[system_prompt]\n{sp}\n\n[response]\n{rp}")
+        sys.exit(0)
+    if len(sys.argv) not in (3, 5):
+        print("사용법: python response_store.py <sc.csv> <sc.csv.rstore> [system_prompt 열] [response_prompt 열]")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    cols = sys.argv[3:5] or ["system_prompt", "response_prompt"]
+    n = build_store(src, dst, cols[0], cols[1])
+    print(f"저장소 생성 완료: {dst} ({n} rows, {os.path.getsize(dst)} bytes)")
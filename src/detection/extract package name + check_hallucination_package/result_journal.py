@@ -0,0 +1,70 @@
+import os, json
+from typing import Dict, List, Tuple
+
+# -----------------------------
+# 키워드 판정 append-only 저널(JSONL)
+#   - 판정 1건 = 1줄, 완료 즉시 추가(기존 레코드는 다시 쓰지 않음)
+#   - 실행이 끝나 최종 CSV를 만든 뒤에는 {"_done": true} 표식과 함께 압축(compact)
+#   - 재개 시: 마지막 _done 이후 줄 = 중단된 실행의 판정(그대로 재사용),
+#              그 이전 줄 = 지난 실행 결과(라인 병합용 이력)
+#   - 쓰는 도중 죽어서 잘린 마지막 줄은 재생 시 무시
+# -----------------------------
+DONE_MARKER = {"_done": True}
+
+class ResultJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = None
+        self.bytes_written = 0
+
+    def replay(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """(전체 이력: keyword -> 마지막 레코드, 중단된 실행의 레코드) 반환"""
+        history: Dict[str, Dict] = {}
+        pending: Dict[str, Dict] = {}
+        if not os.path.exists(self.path):
+            return history, pending
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # 잘린 줄(비정상 종료)
+                if rec.get("_done"):
+                    pending = {}
+                    continue
+                kw = rec.get('keyword')
+                if kw is None: continue
+                history[kw] = rec
+                pending[kw] = rec
+        return history, pending
+
+    def append(self, record: Dict):
+        if self._f is None:
+            self._f = open(self.path, 'a', encoding='utf-8')
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._f.write(line)
+        self._f.flush()
+        self.bytes_written += len(line.encode('utf-8'))
+
+    def sync(self):
+        """체크포인트: OS 버퍼까지 디스크에 반영"""
+        if self._f is not None:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def compact(self, records: List[Dict]):
+        """실행 완료 후 최종 레코드 + _done 표식으로 저널을 원자적으로 교체"""
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.write(json.dumps(DONE_MARKER) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
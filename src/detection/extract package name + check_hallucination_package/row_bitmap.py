@@ -0,0 +1,309 @@
+import os, sys, json, struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# -----------------------------
+# 행 번호 집합용 압축 비트맵(Roaring 방식)
+#   32비트 행 번호를 상위 16비트(청크 키)로 나눠 청크마다 컨테이너 하나:
+#     - 원소 ARRAY_MAX개 이하: 정렬된 array('H') (원소당 2바이트)
+#     - 그보다 많으면: 65536비트 비트셋(파이썬 int, 8KB 고정)
+#   합/교/차집합은 청크 단위로 컨테이너끼리 계산하고, 결과 크기에 맞게 형태를 다시 고른다.
+#
+# RowSetIndex: (차원, 키) → RowBitmap 모음 + 파일 저장/로드
+#   차원 예) 'keyword:<모델>'(키=키워드), 'hallucinated'(키=모델), 'answered'(키=모델),
+#           'prompt'(키=system prompt 원문), 'strategy:<모델>'(키=전략 이름)
+#   예) index.rows('hallucinated', 'marin') - index.rows('hallucinated', 'qwen')
+# -----------------------------
+ARRAY_MAX = 4096
+CHUNK_BITS = 1 << 16
+Container = Union[array, int]
+
+def _card(c: Container) -> int:
+    return len(c) if isinstance(c, array) else bin(c).count('1')
+
+def _to_bits(c: Container) -> int:
+    if not isinstance(c, array):
+        return c
+    buf = bytearray(CHUNK_BITS // 8)
+    for v in c:
+        buf[v >> 3] |= 1 << (v & 7)
+    return int.from_bytes(buf, 'little')
+
+def _bits_values(bits: int) -> array:
+    out = array('H')
+    buf = bits.to_bytes(CHUNK_BITS // 8, 'little')
+    for i, byte in enumerate(buf):
+        base = i << 3
+        while byte:
+            low = byte & -byte
+            out.append(base + low.bit_length() - 1)
+            byte ^= low
+    return out
+
+def _le_bytes(c: array) -> bytes:
+    if sys.byteorder == 'little':
+        return c.tobytes()
+    swapped = array('H', c)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+def _shrink(c: Container) -> Optional[Container]:
+    """빈 컨테이너는 None, 원소 수에 맞는 형태로 변환"""
+    n = _card(c)
+    if n == 0:
+        return None
+    if isinstance(c, array):
+        return _to_bits(c) if n > ARRAY_MAX else c
+    return _bits_values(c) if n <= ARRAY_MAX else c
+
+def _union(a: Container, b: Container) -> Container:
+    if isinstance(a, array) and isinstance(b, array):
+        return array('H', sorted(set(a).union(b)))
+    return _to_bits(a) | _to_bits(b)
+
+def _intersection(a: Container, b: Container) -> Container:
+    if isinstance(a, array) and isinstance(b, array):
+        if len(a) > len(b): a, b = b, a
+        other = set(b)
+        return array('H', (v for v in a if v in other))
+    if isinstance(a, array):
+        return array('H', (v for v in a if b >> v & 1))
+    if isinstance(b, array):
+        return array('H', (v for v in b if a >> v & 1))
+    return a & b
+
+def _difference(a: Container, b: Container) -> Container:
+    if isinstance(a, array):
+        if isinstance(b, array):
+            other = set(b)
+            return array('H', (v for v in a if v not in other))
+        return array('H', (v for v in a if not b >> v & 1))
+    return a & ~_to_bits(b)
+
+class RowBitmap:
+    """행 번호(0 ≤ n < 2^32) 집합. |, &, -, len, in, 정렬 순회 지원"""
+    __slots__ = ('_chunks',)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._chunks: Dict[int, Container] = {}
+        groups: Dict[int, List[int]] = {}
+        for v in values:
+            groups.setdefault(v >> 16, []).append(v & 0xFFFF)
+        for key, lows in groups.items():
+            c = _shrink(array('H', sorted(set(lows))))
+            if c is not None:
+                self._chunks[key] = c
+
+    @classmethod
+    def _from_chunks(cls, chunks: Dict[int, Container]) -> 'RowBitmap':
+        bm = cls()
+        bm._chunks = chunks
+        return bm
+
+    def add(self, v: int):
+        key, low = v >> 16, v & 0xFFFF
+        c = self._chunks.get(key)
+        if c is None:
+            self._chunks[key] = array('H', [low])
+        elif isinstance(c, array):
+            # 컨테이너는 연산 결과끼리 공유될 수 있으므로 제자리 수정하지 않는다
+            if low > c[-1]:
+                c = array('H', c)
+                c.append(low)
+            elif low not in c:
+                c = array('H', sorted(set(c) | {low}))
+            self._chunks[key] = _shrink(c)
+        else:
+            self._chunks[key] = c | (1 << low)
+
+    def __contains__(self, v: int) -> bool:
+        c = self._chunks.get(v >> 16)
+        if c is None:
+            return False
+        low = v & 0xFFFF
+        return low in c if isinstance(c, array) else bool(c >> low & 1)
+
+    def __len__(self) -> int:
+        return sum(_card(c) for c in self._chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._chunks):
+            c = self._chunks[key]
+            base = key << 16
+            for low in (c if isinstance(c, array) else _bits_values(c)):
+                yield base + low
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RowBitmap):
+            return NotImplemented
+        if self._chunks.keys() != other._chunks.keys():
+            return False
+        return all(_to_bits(c) == _to_bits(other._chunks[k]) for k, c in self._chunks.items())
+
+    def __or__(self, other: 'RowBitmap') -> 'RowBitmap':
+        out = dict(self._chunks)
+        for key, c in other._chunks.items():
+            out[key] = _shrink(_union(out[key], c)) if key in out else c
+        return RowBitmap._from_chunks(out)
+
+    def __and__(self, other: 'RowBitmap') -> 'RowBitmap':
+        out = {}
+        for key in self._chunks.keys() & other._chunks.keys():
+            c = _shrink(_intersection(self._chunks[key], other._chunks[key]))
+            if c is not None:
+                out[key] = c
+        return RowBitmap._from_chunks(out)
+
+    def __sub__(self, other: 'RowBitmap') -> 'RowBitmap':
+        out = {}
+        for key, c in self._chunks.items():
+            if key in other._chunks:
+                c = _shrink(_difference(c, other._chunks[key]))
+            if c is not None:
+                out[key] = c
+        return RowBitmap._from_chunks(out)
+
+    def __repr__(self) -> str:
+        head = list(zip(range(8), self))
+        more = ', ...' if len(self) > len(head) else ''
+        return f"RowBitmap([{', '.join(str(v) for _, v in head)}{more}], n={len(self)})"
+
+    def tolist(self) -> List[int]:
+        return list(self)
+
+    # 직렬화: u32 청크 수, 청크마다 u16 키 | u8 형태(0=array, 1=bitset) | u32 원소 수 | 본문
+    def to_bytes(self) -> bytes:
+        parts = [struct.pack('<I', len(self._chunks))]
+        for key in sorted(self._chunks):
+            c = self._chunks[key]
+            if isinstance(c, array):
+                parts.append(struct.pack('<HBI', key, 0, len(c)))
+                parts.append(_le_bytes(c))
+            else:
+                parts.append(struct.pack('<HBI', key, 1, _card(c)))
+                parts.append(c.to_bytes(CHUNK_BITS // 8, 'little'))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, offset: int = 0) -> 'RowBitmap':
+        (n,) = struct.unpack_from('<I', data, offset)
+        pos = offset + 4
+        chunks: Dict[int, Container] = {}
+        for _ in range(n):
+            key, kind, card = struct.unpack_from('<HBI', data, pos)
+            pos += struct.calcsize('<HBI')
+            if kind == 0:
+                c = array('H')
+                c.frombytes(data[pos:pos + 2 * card])
+                if sys.byteorder != 'little':
+                    c.byteswap()
+                chunks[key] = c
+                pos += 2 * card
+            else:
+                chunks[key] = int.from_bytes(data[pos:pos + CHUNK_BITS // 8], 'little')
+                pos += CHUNK_BITS // 8
+        return cls._from_chunks(chunks)
+
+def union(bitmaps: Iterable[RowBitmap]) -> RowBitmap:
+    out = RowBitmap()
+    for bm in bitmaps:
+        out = out | bm
+    return out
+
+def intersection(bitmaps: Iterable[RowBitmap]) -> RowBitmap:
+    it = iter(bitmaps)
+    out = next(it, RowBitmap())
+    for bm in it:
+        out = out & bm
+    return out
+
+# -----------------------------
+# (차원, 키) → RowBitmap 색인
+# -----------------------------
+MAGIC = b'ROWSET01'
+
+class RowSetIndex:
+    def __init__(self):
+        self.sets: Dict[Tuple[str, str], RowBitmap] = {}
+
+    def put(self, dim: str, key: str, bitmap: RowBitmap):
+        self.sets[(dim, key)] = bitmap
+
+    def add(self, dim: str, key: str, rows: Iterable[int]):
+        """기존 비트맵에 합집합으로 추가"""
+        cur = self.sets.get((dim, key))
+        new = RowBitmap(rows)
+        self.sets[(dim, key)] = new if cur is None else cur | new
+
+    def rows(self, dim: str, key: str) -> RowBitmap:
+        return self.sets.get((dim, key), RowBitmap())
+
+    def keys(self, dim: str) -> List[str]:
+        return sorted(k for d, k in self.sets if d == dim)
+
+    def dims(self) -> List[str]:
+        return sorted({d for d, _ in self.sets})
+
+    def any_of(self, dim: str, keys: Iterable[str]) -> RowBitmap:
+        return union(self.rows(dim, k) for k in keys)
+
+    def all_of(self, dim: str, keys: Iterable[str]) -> RowBitmap:
+        return intersection(self.rows(dim, k) for k in keys)
+
+    def cardinality(self, dim: str, key: str) -> int:
+        return len(self.rows(dim, key))
+
+    def merge(self, other: 'RowSetIndex'):
+        for (dim, key), bm in other.sets.items():
+            cur = self.sets.get((dim, key))
+            self.sets[(dim, key)] = bm if cur is None else cur | bm
+
+    # 파일: MAGIC | u32 헤더 길이 | JSON 헤더([[dim, key, offset, length], ...]) | 비트맵 본문
+    def save(self, path: str):
+        entries, blobs, pos = [], [], 0
+        for (dim, key), bm in sorted(self.sets.items()):
+            blob = bm.to_bytes()
+            entries.append([dim, key, pos, len(blob)])
+            blobs.append(blob)
+            pos += len(blob)
+        header = json.dumps(entries, ensure_ascii=False).encode('utf-8')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'RowSetIndex':
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"행 비트맵 색인 형식이 아닙니다: {path}")
+        (hlen,) = struct.unpack_from('<I', data, len(MAGIC))
+        start = len(MAGIC) + 4
+        entries = json.loads(data[start:start + hlen].decode('utf-8'))
+        body = start + hlen
+        index = cls()
+        for dim, key, offset, _ in entries:
+            index.sets[(dim, key)] = RowBitmap.from_bytes(data, body + offset)
+        return index
+
+if __name__ == "__main__":
+    # 사용법: python row_bitmap.py <행 비트맵 색인 파일> [차원]
+    if len(sys.argv) not in (2, 3):
+        print("사용법: python row_bitmap.py <FINAL_....rowsets> [차원]")
+        sys.exit(1)
+    index = RowSetIndex.load(sys.argv[1])
+    for dim in ([sys.argv[2]] if len(sys.argv) == 3 else index.dims()):
+        keys = index.keys(dim)
+        print(f"[{dim}] {len(keys)} keys")
+        for key in keys[:20]:
+            print(f"  {key[:60]:<60s} {index.cardinality(dim, key):>8d} rows")
+        if len(keys) > 20:
+            print("  ...")
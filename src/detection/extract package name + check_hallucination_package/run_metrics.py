@@ -0,0 +1,83 @@
+import os, json, time, threading
+from contextlib import contextmanager
+from collections import Counter
+from typing import Dict, Iterator, Iterable
+
+# -----------------------------
+# 실행 단계별 계측(벽시계/CPU 시간 + 카운터)
+#   with metrics.stage('load'): ...   → 단계 시간 누적(같은 이름은 합산, calls 증가)
+#   metrics.timed_iter('registry', it) → 지연 소비되는 iterator의 next() 대기 시간만 누적
+#   metrics.count('bytes_written', n)  → 카운터 누적
+#   CPU 시간은 process_time(이 프로세스의 모든 스레드 합계, 추출 워커 프로세스는 제외)
+# -----------------------------
+class RunMetrics:
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self.started_at = time.time()
+
+    def add_time(self, name: str, wall: float, cpu: float, calls: int = 1):
+        with self._lock:
+            st = self.stages.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            st['wall_s'] += wall
+            st['cpu_s'] += cpu
+            st['calls'] += calls
+
+    @contextmanager
+    def stage(self, name: str):
+        w, c = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - w, time.process_time() - c)
+
+    def timed_iter(self, name: str, it: Iterable) -> Iterator:
+        it = iter(it)
+        wall = cpu = 0.0
+        try:
+            while True:
+                w, c = time.perf_counter(), time.process_time()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    wall += time.perf_counter() - w
+                    cpu += time.process_time() - c
+                yield item
+        finally:
+            self.add_time(name, wall, cpu)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def to_dict(self) -> Dict:
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'total_wall_s': time.perf_counter() - self._wall0,
+            'total_cpu_s': time.process_time() - self._cpu0,
+            'stages': self.stages,
+            'counters': dict(self.counters),
+        }
+
+    def save(self, path: str, **extra):
+        """지표를 JSON으로 저장(임시 파일 → 교체)"""
+        data = {**extra, **self.to_dict()}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def print_summary(self):
+        d = self.to_dict()
+        total = d['total_wall_s'] or 1e-9
+        print(f"\n{'단계':<16s}{'wall(s)':>10s}{'cpu(s)':>10s}{'calls':>8s}{'비율':>8s}")
+        for name, st in self.stages.items():
+            print(f"{name:<16s}{st['wall_s']:>10.3f}{st['cpu_s']:>10.3f}{st['calls']:>8d}{st['wall_s'] / total:>8.1%}")
+        print(f"{'(전체)':<16s}{d['total_wall_s']:>10.3f}{d['total_cpu_s']:>10.3f}")
+        for name, n in sorted(self.counters.items()):
+            print(f"  {name:<28s}{n:>14,d}")
@@ -0,0 +1,216 @@
+import os, re, sys, json, hashlib, tempfile
+import numpy as np
+from typing import Iterable, List, Tuple
+from npm_name_index import load_snapshot_names
+
+# -----------------------------
+# 오프라인 유사 패키지(타이포스쿼팅 후보) 색인
+#   Socket.dev check_typosquatting(이름당 1회 요청, rate limit) 대신
+#   npm 이름 스냅샷으로 한 번 만들어 두고 로컬에서 top-k 근접 패키지를 찾는다.
+#   색인 = 디렉터리 하나(.npy 파일들, 조회 시 mmap):
+#     blob / offsets   : UTF-8 바이트 기준 정렬된 이름(npm_name_index와 같은 순서)
+#     tg_keys / tg_indptr / tg_ids : 3-gram(앞뒤 경계 문자 포함) → 이름 id 역색인(CSR)
+#     canon_keys / canon_ids       : 구분자/".js" 접미사를 뗀 정규형 해시 → 이름 id
+#   조회: ① 정규형이 같은 이름(commander.js → commander, node_fetch → node-fetch)
+#         ② 3-gram 공유 수 상위 후보를 편집 거리(인접 전치 포함)로 검증
+# -----------------------------
+FORMAT_VERSION = 2         # 정규형 규칙이 바뀌면 올릴 것(canon_keys 재생성)
+BOS, EOS = 0x01, 0x02      # 이름 앞뒤 경계(첫/끝 글자 오타도 3-gram에 반영)
+MAX_DISTANCE = 2           # 편집 거리 후보 상한
+MAX_CANDIDATES = 256       # 편집 거리로 검증할 3-gram 상위 후보 수
+TOP_K = 5
+
+SEPARATOR_RE = re.compile(r"[-_.]")
+JS_SUFFIX_RE = re.compile(r"(?<=.)[-_.]js$")  # 구분자 필수: nextjs ≠ next
+
+ARRAYS = ('blob', 'offsets', 'tg_keys', 'tg_indptr', 'tg_ids', 'canon_keys', 'canon_ids')
+
+def canonical_name(name: str) -> str:
+    """구분자 변형 비교용 정규형: 소문자, 끝의 (.|-|_)js 제거, 구분자 제거"""
+    name = JS_SUFFIX_RE.sub('', name.lower())
+    return SEPARATOR_RE.sub('', name)
+
+def _canon_key(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(canonical_name(name).encode('utf-8'), digest_size=8).digest(), 'little') >> 1
+
+def _trigram_keys(key: bytes) -> np.ndarray:
+    """경계 문자를 붙인 바이트열의 3-gram 정수 키(중복 제거)"""
+    b = np.frombuffer(bytes([BOS]) + key + bytes([EOS]), dtype=np.uint8).astype(np.int32)
+    return np.unique((b[:-2] << 16) | (b[1:-1] << 8) | b[2:])
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """인접 전치를 1회 편집으로 보는 편집 거리(OSA). limit 초과가 확정되면 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        ca = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, prev2[j - 2] + 1)
+            cur[j] = d
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+def build_index(names: Iterable[str], index_dir: str) -> int:
+    """이름 목록으로 색인 디렉터리 생성, 기록한 이름 수 반환"""
+    keys = sorted({n.encode('utf-8') for n in names})
+    count = len(keys)
+    lengths = np.fromiter((len(k) for k in keys), dtype=np.int64, count=count)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    blob = np.frombuffer(b''.join(keys), dtype=np.uint8)
+
+    # 3-gram 역색인: 이름마다 경계 문자를 붙인 바이트열에서 (키, id) 쌍을 벡터 연산으로 생성
+    padded = np.frombuffer(b''.join(bytes([BOS]) + k + bytes([EOS]) for k in keys), dtype=np.uint8).astype(np.int64)
+    owner = np.repeat(np.arange(count, dtype=np.int64), lengths + 2)
+    start = np.repeat(offsets[:-1] + 2 * np.arange(count), lengths + 2)
+    pos = np.arange(len(padded), dtype=np.int64) - start
+    valid = pos[:-2] < np.repeat(lengths, lengths + 2)[:-2]  # 같은 이름 안에서 끝나는 3-gram만
+    tri = (padded[:-2] << 16) | (padded[1:-1] << 8) | padded[2:]
+    pairs = np.unique((tri[valid] << 32) | owner[:-2][valid])
+    tg_all = (pairs >> 32).astype(np.int32)
+    tg_ids = (pairs & 0xFFFFFFFF).astype(np.int32)
+    tg_keys, tg_first = np.unique(tg_all, return_index=True)
+    tg_indptr = np.append(tg_first, len(tg_all)).astype(np.int64)
+
+    # 정규형 → id (해시 정렬, 조회 시 정규형 재계산으로 충돌 확인)
+    canon = np.fromiter((_canon_key(k.decode('utf-8')) for k in keys), dtype=np.int64, count=count)
+    order = np.argsort(canon, kind='stable')
+
+    tmp_dir = index_dir.rstrip('/\\') + '.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    arrays = dict(blob=blob, offsets=offsets, tg_keys=tg_keys, tg_indptr=tg_indptr, tg_ids=tg_ids,
+                  canon_keys=canon[order], canon_ids=order.astype(np.int32))
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_dir, name + '.npy'), arr)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': FORMAT_VERSION, 'count': count}, f)
+    if os.path.isdir(index_dir):
+        for fn in os.listdir(index_dir):
+            os.remove(os.path.join(index_dir, fn))
+        os.rmdir(index_dir)
+    os.replace(tmp_dir, index_dir)
+    return count
+
+class TypoIndex:
+    """build_index로 만든 디렉터리를 mmap으로 열어 근접 패키지 조회 제공"""
+
+    def __init__(self, index_dir: str):
+        meta_path = os.path.join(index_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise ValueError(f"유사 패키지 색인 형식이 아닙니다: {index_dir}")
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"유사 패키지 색인 버전 불일치: {index_dir} (다시 생성 필요)")
+        self.count = meta['count']
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(index_dir, name + '.npy'), mmap_mode='r'))
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def name_at(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def variants(self, name: str) -> List[int]:
+        """정규형이 같은 이름 id(자기 자신 포함 가능)"""
+        key = _canon_key(name)
+        lo = np.searchsorted(self.canon_keys, key, side='left')
+        hi = np.searchsorted(self.canon_keys, key, side='right')
+        canon = canonical_name(name)
+        return [int(i) for i in self.canon_ids[lo:hi] if canonical_name(self.name_at(i)) == canon]
+
+    def _trigram_candidates(self, key: bytes, max_distance: int) -> np.ndarray:
+        """3-gram 공유 수 상위 후보 id(길이 차가 max_distance 이하인 이름만)"""
+        qgrams = _trigram_keys(key)
+        lo = np.searchsorted(self.tg_keys, qgrams, side='left')
+        found = (lo < len(self.tg_keys)) & (self.tg_keys[np.minimum(lo, len(self.tg_keys) - 1)] == qgrams)
+        parts = []
+        for i in lo[found]:
+            ids = self.tg_ids[self.tg_indptr[i]:self.tg_indptr[i + 1]]
+            parts.append(ids[np.abs(self.lengths[ids] - len(key)) <= max_distance])
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        ids, shared = np.unique(np.concatenate(parts), return_counts=True)
+        # 편집 1회는 3-gram을 최대 3개 깨뜨림 → 공유 수 하한으로 거른 뒤 상위 후보만 검증
+        keep = shared >= len(qgrams) - 3 * max_distance
+        ids, shared = ids[keep], shared[keep]
+        if len(ids) > MAX_CANDIDATES:
+            top = np.argpartition(-shared, MAX_CANDIDATES - 1)[:MAX_CANDIDATES]
+            ids = ids[top]
+        return ids
+
+    def suggest(self, name: str, k: int = TOP_K, max_distance: int = MAX_DISTANCE) -> List[Tuple[str, int]]:
+        """
+        name과 가까운 실존 패키지 top-k: [(패키지명, 편집 거리)]
+        정규형이 같은 이름(구분자/.js 변형)을 먼저, 나머지는 거리 → 이름 순.
+        name 자체가 스냅샷에 있으면 결과에서 뺀다.
+        """
+        found = {}
+        for i in self.variants(name):
+            cand = self.name_at(i)
+            if cand != name:
+                found[cand] = (0, edit_distance(name, cand, len(name) + len(cand)))
+        for i in self._trigram_candidates(name.encode('utf-8'), max_distance):
+            cand = self.name_at(int(i))
+            if cand == name or cand in found:
+                continue
+            d = edit_distance(name, cand, max_distance)
+            if d <= max_distance:
+                found[cand] = (1, d)
+        ranked = sorted(found.items(), key=lambda item: (item[1], item[0]))
+        return [(cand, d) for cand, (_, d) in ranked[:k]]
+
+# 정규형 회귀 점검(python typo_index.py --check): (조회 이름, 이름 목록, 정규형 일치(tier 0)로 나와야/나오면 안 되는 이름)
+CHECK_CASES = [
+    ("commander.js", ["commander", "commander-js"], ["commander", "commander-js"], []),
+    ("node_fetch", ["node-fetch", "nodefetch"], ["node-fetch", "nodefetch"], []),
+    ("next", ["nextjs", "next-js"], ["next-js"], ["nextjs"]),
+    ("x", ["xjs", "x.js"], ["x.js"], ["xjs"]),
+    ("socket", ["socketjs", "socket.js"], ["socket.js"], ["socketjs"]),
+]
+
+def self_check() -> bool:
+    """CHECK_CASES를 작은 임시 색인으로 확인, 모두 통과하면 True"""
+    ok = True
+    for query, names, expect, forbid in CHECK_CASES:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_dir = os.path.join(tmp, 'index')
+            build_index(names, index_dir)
+            index = TypoIndex(index_dir)
+            tier0 = {index.name_at(i) for i in index.variants(query)} - {query}
+            bad = [n for n in expect if n not in tier0] + [n for n in forbid if n in tier0]
+            print(f"{'OK ' if not bad else 'FAIL'} {query} -> {sorted(tier0)}")
+            ok = ok and not bad
+            del index
+    return ok
+
+if __name__ == "__main__":
+    # 사용법: python typo_index.py <npm_package_names.csv> <출력 색인 디렉터리>
+    #         python typo_index.py --query <색인 디렉터리> <이름> [<이름> ...]
+    #         python typo_index.py --check   (정규형 회귀 점검, 실패 시 종료 코드 1)
+    if sys.argv[1:] == ['--check']:
+        sys.exit(0 if self_check() else 1)
+    if len(sys.argv) >= 4 and sys.argv[1] == '--query':
+        index = TypoIndex(sys.argv[2])
+        for q in sys.argv[3:]:
+            print(q, '->', index.suggest(q))
+        sys.exit(0)
+    if len(sys.argv) != 3:
+        print("사용법: python typo_index.py <npm_package_names.csv> <npm_typo_index>")
+        print("        python typo_index.py --query <npm_typo_index> <이름> ...")
+        print("        python typo_index.py --check")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    n = build_index(load_snapshot_names(src), dst)
+    size = sum(os.path.getsize(os.path.join(dst, fn)) for fn in os.listdir(dst))
+    print(f"색인 생성 완료: {dst} ({n} names, {size} bytes)")